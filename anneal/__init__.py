@@ -1,2 +1,17 @@
+from .aio import *  # noqa
 from .anneal import *  # noqa
+from .checkpoint import *  # noqa
+from .cli import *  # noqa
+from .ensemble import *  # noqa
+from .equilibration import *  # noqa
+from .instruments import *  # noqa
+from .logs import *  # noqa
+from .metropolis import *  # noqa
+from .multistart import *  # noqa
+from .population import *  # noqa
+from .rng import *  # noqa
+from .schedules import *  # noqa
+from .tempering import *  # noqa
+from .trace import *  # noqa
+from .tuning import *  # noqa
 from .version import __version__  # noqa
@@ -0,0 +1,243 @@
+'''Asyncio front end for anneal.
+
+This module contains AsyncAnnealer, which runs simulated_annealing from
+asyncio code without blocking the event loop: runs are offloaded to a
+process (or thread) pool, at most max_concurrency of them at a time, their
+progress is streamed through async iterators (which only keep the latest
+records of a run, if they are not read fast enough), and they can be
+cancelled at the end of any temperature step.
+'''
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from .anneal import iter_simulated_annealing
+
+__all__ = ['AsyncAnnealer', 'AnnealingJob']
+
+
+def _put_record(records_queue, record, max_records):
+    '''
+    Put record into records_queue, first dropping the oldest record if
+    there are already max_records of them (the run is the only producer,
+    so that there is then room for the record).
+    '''
+    if records_queue.qsize() >= max_records:
+        try:
+            records_queue.get_nowait()
+        except queue.Empty:
+            # the records have just been read
+            pass
+    records_queue.put_nowait(record)
+
+
+def _run_job(P, ID, kwargs, records_queue, cancel, max_records):
+    '''
+    Perform a run, putting a TemperatureRecord into records_queue after
+    each temperature step (keeping at most max_records of them, and None
+    at the end), and stopping as soon as cancel is set (it runs in the
+    executor).
+    '''
+    try:
+        records = iter_simulated_annealing(P, ID, **kwargs)
+        stop = False
+        while True:
+            try:
+                # a just-started generator only accepts None
+                record = records.send(True if stop else None)
+            except StopIteration as stop_iteration:
+                return stop_iteration.value
+            _put_record(records_queue, record, max_records)
+            stop = cancel.is_set()
+    finally:
+        # there is always room for it, see AsyncAnnealer._channels
+        records_queue.put_nowait(None)
+
+
+class AnnealingJob(object):
+    '''
+    A simulated-annealing run started by AsyncAnnealer.start.
+
+    The job is an async iterator over the TemperatureRecord of each
+    temperature step, as they are produced:
+
+        async for record in job:
+            ...
+
+    If the records are not read as fast as they are produced, only the
+    latest max_records of them (see AsyncAnnealer) are kept, while the
+    older ones are dropped; all of them are in the E returned by result().
+
+    Methods
+    -------
+    result()
+        Coroutine, returning P, E and elapsed_time (as for
+        simulated_annealing) when the run is over. If the coroutine
+        awaiting it is cancelled, the run is cancelled too.
+    cancel()
+        Stop the run at the end of the current temperature step (P is
+        then restored to its lowest-energy configuration, if possible, and
+        result() returns normally), or, if the run did not start yet,
+        do not start it (and result() raises asyncio.CancelledError).
+    done()
+        Return True if the run is over.
+    '''
+
+    def __init__(self, future, records_queue, cancel, pump):
+        self._future = future
+        self._wrapped = asyncio.wrap_future(future)
+        self._queue = records_queue
+        self._cancel = cancel
+        self._pump = pump
+        self._finished = False
+        self.cancelled = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._finished:
+            raise StopAsyncIteration
+        loop = asyncio.get_running_loop()
+        record = await loop.run_in_executor(self._pump, self._queue.get)
+        if record is None:
+            self._finished = True
+            raise StopAsyncIteration
+        return record
+
+    async def result(self):
+        try:
+            return await asyncio.shield(self._wrapped)
+        except asyncio.CancelledError:
+            if not self._wrapped.cancelled():
+                self.cancel()
+            raise
+
+    def cancel(self):
+        self.cancelled = True
+        if self._future.cancel():
+            # the run never started, and will not produce any record
+            self._queue.put(None)
+        else:
+            self._cancel.set()
+
+    def done(self):
+        return self._future.done()
+
+
+class AsyncAnnealer(object):
+    '''
+    Asyncio front end for simulated_annealing.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, optional
+        Process or thread pool where runs are performed. With a process
+        pool, problem instances are pickled to the workers, and the
+        results contain a copy of them; with a thread pool, they are
+        changed in place, but runs only proceed in parallel if the
+        problem class releases the GIL (default: None, a new
+        ProcessPoolExecutor, shut down by shutdown())
+    max_concurrency : int, optional
+        Maximum number of runs submitted to the executor at the same time;
+        start() waits for a free slot, so that callers are slowed down
+        when the executor is busy (default: None, the number of CPUs)
+    max_records : int, optional
+        Maximum number of records of a run waiting to be read from its
+        AnnealingJob; when there are more, the oldest ones are dropped, so
+        that the memory used by a run which is not iterated (e.g. one
+        started by run()) is bounded (default: 1000)
+
+    Methods
+    -------
+    start(P, ID, **kwargs)
+        Coroutine: wait for a free slot, submit a run of
+        simulated_annealing(P, ID, **kwargs), and return its
+        AnnealingJob.
+    run(P, ID, **kwargs)
+        Coroutine: start a run and return its result.
+    shutdown()
+        Release the resources (including the executor, if it was created
+        by AsyncAnnealer); also called at the end of an "async with"
+        block.
+
+    Notes
+    -----
+    A typical use is
+
+        async with AsyncAnnealer(max_concurrency=4) as annealer:
+            job = await annealer.start(P, 'ID', beta_max=1e2)
+            async for record in job:
+                print(record.beta, record.energy)
+            P, E, elapsed_time = await job.result()
+    '''
+
+    def __init__(self, executor=None, max_concurrency=None,
+                 max_records=1000):
+        if max_records < 1:
+            raise ValueError('max_records must be positive, not %r'
+                             % max_records)
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=max_concurrency)
+        self.executor = executor
+        if max_concurrency is None:
+            max_concurrency = os.cpu_count() or 1
+        self.max_concurrency = max_concurrency
+        self.max_records = max_records
+        # threads waiting for the records of the runs
+        self._pump = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._semaphore = None
+        self._manager = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def _channels(self):
+        '''
+        Return a queue for the records and an event for cancellation,
+        which can be shared with the executor workers. The queue has room
+        for max_records records and for the final None.
+        '''
+        maxsize = self.max_records + 1
+        if isinstance(self.executor, ProcessPoolExecutor):
+            if self._manager is None:
+                self._manager = multiprocessing.Manager()
+            return self._manager.Queue(maxsize), self._manager.Event()
+        return queue.Queue(maxsize), threading.Event()
+
+    async def start(self, P, ID, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        await self._semaphore.acquire()
+        try:
+            records_queue, cancel = self._channels()
+            future = self.executor.submit(_run_job, P, ID, kwargs,
+                                          records_queue, cancel,
+                                          self.max_records)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        job = AnnealingJob(future, records_queue, cancel, self._pump)
+        job._wrapped.add_done_callback(
+            lambda wrapped: self._semaphore.release())
+        return job
+
+    async def run(self, P, ID, **kwargs):
+        job = await self.start(P, ID, **kwargs)
+        return await job.result()
+
+    def shutdown(self):
+        if self._own_executor:
+            self.executor.shutdown()
+        self._pump.shutdown()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
@@ -1,18 +1,370 @@
 '''Main module for anneal.
 
-This module contains the main (and only, by now) function of anneal:
-simulated_annealing.
+This module contains the main function of anneal, simulated_annealing,
+its iterator variant iter_simulated_annealing, and
+resume_simulated_annealing, which continues a checkpointed run.
 '''
 
+import bisect
+import itertools
+import math
+import numbers
 import time
 
-__all__ = ['simulated_annealing']
+from .checkpoint import load_checkpoint, save_checkpoint, set_rng_state
+from .instruments import TemperatureRecord
+from .logs import TextLog
+from .metropolis import Metropolis, _ProbabilityCache
+from .rng import seeded_random
+from .schedules import GeometricSchedule
+from .trace import Trace
+
+__all__ = ['simulated_annealing', 'iter_simulated_annealing',
+           'resume_simulated_annealing']
+
+
+def _has_propose(P):
+    '''
+    Return True if P has the propose/accept/reject methods.
+    '''
+    return (hasattr(P, 'propose') and hasattr(P, 'accept') and
+            hasattr(P, 'reject'))
+
+
+def _has_local_moves(P):
+    '''
+    Return True if P has the local_moves/apply_move methods.
+    '''
+    return hasattr(P, 'local_moves') and hasattr(P, 'apply_move')
+
+
+def _problem_rng(P, rng):
+    '''
+    Return rng, or (if it is None) the numpy generator of P, stored as
+    P.rng by set_rng, or None if P has none.
+    '''
+    if rng is None:
+        rng = getattr(P, 'rng', None)
+        if not hasattr(rng, 'integers'):
+            return None
+    return rng
+
+
+def _default_acceptance(P, rng):
+    '''
+    Return a Metropolis acceptance test for P, with uniform random numbers
+    drawn from a random.Random seeded by rng (or by the generator of P,
+    see _problem_rng, or by the global random module); if P.energy is an
+    integer, acceptance probabilities are cached.
+    '''
+    return Metropolis(rng=seeded_random(_problem_rng(P, rng)),
+                      discrete=isinstance(P.energy, numbers.Integral))
+
+
+class _BestState(object):
+    '''
+    Lowest energy reached so far by P, and snapshot of the configuration
+    where it was reached. update() is called after the moves which may
+    lower the energy, and only takes a snapshot when the energy improves.
+    '''
+
+    def __init__(self, P, energy=float('inf'), state=None):
+        self.P = P
+        self.energy = energy
+        self.state = state
+
+    def update(self):
+        if self.P.energy < self.energy:
+            self.energy = self.P.energy
+            self.state = self.P.snapshot()
+
+
+class _ProposeMoves(object):
+    '''
+    MC moves of a problem with the propose/accept/reject methods, where
+    the acceptance test is done by the engine. It has the MC_move,
+    MC_sweep and energy attributes, so that it can be used in place of
+    the problem. If best (a _BestState) is given, it is updated after
+    each accepted move.
+    '''
+
+    def __init__(self, P, acceptance, best=None):
+        self.P = P
+        self.acceptance = acceptance
+        self.best = best
+        self._beta = None
+
+    @property
+    def energy(self):
+        return self.P.energy
+
+    def MC_sweep(self, n_steps):
+        P = self.P
+        if P.beta != self._beta:
+            self.acceptance.set_beta(P.beta)
+            self._beta = P.beta
+        propose, accept, reject = P.propose, P.accept, P.reject
+        test = self.acceptance.accept
+        best = self.best
+        acc = 0
+        for step in range(n_steps):
+            if test(propose()):
+                accept()
+                acc += 1
+                if best is not None and P.energy < best.energy:
+                    best.update()
+            else:
+                reject()
+        return acc
+
+    def MC_move(self):
+        return self.MC_sweep(1)
+
+
+class _RejectionFreeMoves(object):
+    '''
+    Rejection-free (n-fold way) MC moves of a problem with the
+    local_moves/apply_move methods.
+
+    Each move listed by P.local_moves() is proposed with equal
+    probability, and accepted with the Metropolis probability
+    min(1, exp(-beta*dE)): instead of simulating the rejections, the
+    number of proposals until the next accepted move is drawn from its
+    geometric distribution, and the accepted move is chosen with
+    probability proportional to its acceptance probability. MC_sweep(n)
+    then counts n proposals (and returns the number of accepted moves),
+    as for a Metropolis sweep, but its cost is proportional to the
+    number of accepted moves.
+
+    If fallback (the usual MC moves of P) is given, it is used instead
+    at each temperature which follows one with acceptance ratio (or,
+    for the first one, whose initial acc_ratio is) at least threshold.
+    If best (a _BestState) is given, it is updated after each move.
+
+    MC_sweep_with_stats(n) also returns the sums of the energy and of its
+    square over the n proposals (the energy after a rejected proposal
+    being the current one), so that the schedules which need energy
+    statistics do not fall back to a MC_sweep(1) per proposal.
+    '''
+
+    def __init__(self, P, random_state, fallback=None,
+                 threshold=float('inf'), acc_ratio=1.0, best=None):
+        self.P = P
+        self.random = random_state.random
+        self.fallback = fallback
+        self.best = best
+        self.threshold = threshold
+        self._use_fallback = fallback is not None and acc_ratio >= threshold
+        self._discrete = isinstance(P.energy, numbers.Integral)
+        self._beta = None
+        self._n_steps = 0
+        self._acc = 0
+
+    @property
+    def energy(self):
+        return self.P.energy
+
+    def _set_beta(self, beta):
+        if self.fallback is not None and self._n_steps:
+            self._use_fallback = (self._acc >=
+                                  self.threshold * self._n_steps)
+        self._n_steps = 0
+        self._acc = 0
+        self._beta = beta
+        self._probabilities = _ProbabilityCache(beta)
+
+    def MC_sweep(self, n_steps):
+        return self._sweep(n_steps, False)[0]
+
+    def MC_sweep_with_stats(self, n_steps):
+        return self._sweep(n_steps, True)
+
+    def _sweep(self, n_steps, with_stats):
+        if self.P.beta != self._beta:
+            self._set_beta(self.P.beta)
+        if not self._use_fallback:
+            result = self._rejection_free_sweep(n_steps)
+        elif with_stats:
+            result = _MC_moves_with_stats(self.fallback, n_steps, self.best)
+        else:
+            result = (_MC_moves(self.fallback, n_steps, self.best),
+                      None, None)
+        self._n_steps += n_steps
+        self._acc += result[0]
+        return result
+
+    def _rejection_free_sweep(self, n_steps):
+        P = self.P
+        beta = self._beta
+        probabilities = self._probabilities
+        discrete = self._discrete
+        exp = math.exp
+        rand = self.random
+        best = self.best
+        t = 0
+        acc = 0
+        sum_E = 0.0
+        sum_E2 = 0.0
+        while True:
+            moves = P.local_moves()
+            n_moves = len(moves)
+            if not n_moves:
+                break
+            if discrete:
+                weights = [1.0 if dE <= 0 else probabilities[dE]
+                           for move, dE in moves]
+            else:
+                weights = [1.0 if dE <= 0 else exp(- beta * dE)
+                           for move, dE in moves]
+            cumulative = list(itertools.accumulate(weights))
+            total = cumulative[-1]
+            # probability that a proposal is accepted
+            p_acc = total / n_moves
+            if p_acc <= 0.0:
+                break
+            # number of rejected proposals before the next accepted one,
+            # from its geometric distribution
+            if p_acc >= 1.0:
+                n_rejected = 0.0
+            else:
+                n_rejected = (math.log(1.0 - rand()) /
+                              math.log1p(- p_acc))
+            if t + n_rejected >= n_steps:
+                break
+            n_rejected = int(n_rejected)
+            energy = P.energy
+            sum_E += n_rejected * energy
+            sum_E2 += n_rejected * energy ** 2
+            t += 1 + n_rejected
+            ind = bisect.bisect_right(cumulative, rand() * total)
+            P.apply_move(moves[min(ind, n_moves - 1)][0])
+            acc += 1
+            energy = P.energy
+            sum_E += energy
+            sum_E2 += energy ** 2
+            if best is not None and energy < best.energy:
+                best.update()
+        # the remaining proposals are all rejected
+        energy = P.energy
+        sum_E += (n_steps - t) * energy
+        sum_E2 += (n_steps - t) * energy ** 2
+        return acc, sum_E, sum_E2
+
+    def MC_move(self):
+        return self.MC_sweep(1)
+
+
+def _moves(P, acceptance, best=None):
+    '''
+    Return the object whose MC moves are performed by the engine: P
+    itself or, if acceptance is not None, a _ProposeMoves.
+    '''
+    if acceptance is None:
+        return P
+    return _ProposeMoves(P, acceptance, best)
+
+
+def _MC_moves(P, n_steps, best=None):
+    '''
+    Perform n_steps MC moves, and return the number of accepted ones.
+
+    If P has a MC_sweep(n_steps) method, it is used instead of calling
+    P.MC_move() n_steps times. Otherwise, best (a _BestState, if given)
+    is updated after each move.
+    '''
+    MC_sweep = getattr(P, 'MC_sweep', None)
+    if MC_sweep is not None:
+        return MC_sweep(n_steps)
+    acc = 0
+    if best is None:
+        for step in range(n_steps):
+            acc += P.MC_move()
+    else:
+        for step in range(n_steps):
+            acc += P.MC_move()
+            if P.energy < best.energy:
+                best.update()
+    return acc
+
+
+def _MC_moves_with_stats(P, n_steps, best=None):
+    '''
+    Perform n_steps MC moves, and return the number of accepted ones
+    together with the sums of the energy and of its square over the moves;
+    best (a _BestState, if given) is updated after each move.
+
+    If P has a MC_sweep_with_stats(n_steps) method (as _RejectionFreeMoves
+    does), returning the same three values, it is used instead of calling
+    P.MC_move() n_steps times.
+    '''
+    MC_sweep_with_stats = getattr(P, 'MC_sweep_with_stats', None)
+    if MC_sweep_with_stats is not None:
+        return MC_sweep_with_stats(n_steps)
+    acc = 0
+    sum_E = 0.0
+    sum_E2 = 0.0
+    for step in range(n_steps):
+        acc += P.MC_move()
+        energy = P.energy
+        sum_E += energy
+        sum_E2 += energy ** 2
+        if best is not None and energy < best.energy:
+            best.update()
+    return acc, sum_E, sum_E2
+
+
+def _temperature_step(P, n_steps_per_T, with_stats, equilibration,
+                      best=None):
+    '''
+    Perform the MC moves at the current temperature.
+
+    Moves are performed in blocks of equilibration.block_size moves (or
+    all at once, if equilibration is None), until either n_steps_per_T
+    moves are done or the equilibration criterion is met.
+
+    Returns the number of moves and of accepted ones, and the mean and
+    variance of the energy (or None, if with_stats is False).
+    '''
+    if equilibration is None:
+        block_size = n_steps_per_T
+    else:
+        block_size = equilibration.block_size
+    n_steps = acc = 0
+    sum_E = sum_E2 = 0.0
+    acc_ratios = []
+    energies = []
+    while n_steps < n_steps_per_T:
+        n_block = min(block_size, n_steps_per_T - n_steps)
+        if with_stats:
+            acc_block, sum_E_block, sum_E2_block = \
+                _MC_moves_with_stats(P, n_block, best)
+            sum_E += sum_E_block
+            sum_E2 += sum_E2_block
+        else:
+            acc_block = _MC_moves(P, n_block, best)
+        n_steps += n_block
+        acc += acc_block
+        if equilibration is not None:
+            acc_ratios.append(acc_block / float(n_block))
+            energies.append(P.energy)
+            if (n_steps >= equilibration.min_steps and
+                    equilibration.converged(acc_ratios, energies)):
+                break
+    if not with_stats:
+        return n_steps, acc, None, None
+    E_mean = sum_E / n_steps
+    E_var = max(sum_E2 / n_steps - E_mean ** 2, 0.0)
+    return n_steps, acc, E_mean, E_var
 
 
 def simulated_annealing(P, ID, beta_min=1e-2, beta_max=1e2,
                         cooling_rate=1e-2, n_steps_per_T=100,
                         E_min=-float('inf'),
-                        quench_to_T0=False, n_steps_T0=1000):
+                        quench_to_T0=False, n_steps_T0=1000, log=None,
+                        checkpoint_file=None, checkpoint_interval=100,
+                        schedule=None, equilibration=None,
+                        n_T_stagnation=None, instruments=None, rng=None,
+                        acceptance=None, rejection_free=False):
     '''
     General-purpose simulated-annealing optimization function.
 
@@ -30,6 +382,42 @@ def simulated_annealing(P, ID, beta_min=1e-2, beta_max=1e2,
         + P.MC_move(), returning 1/0 (accepted/rejected)
         + P.update_MC_parameters(acc_ratio)
 
+        Optionally, it can include the method
+
+        + P.MC_sweep(n), performing n MC moves and returning the number
+          of accepted ones (used instead of P.MC_move(), when present)
+
+        and the pair of methods
+
+        + P.snapshot(), returning a copy of the current configuration
+        + P.restore(state), setting the configuration (and P.energy) back
+          to a snapshot
+
+        in which case a snapshot is taken whenever the lowest energy so
+        far improves (checked after each move, or only at the end of each
+        temperature step for the moves performed by P.MC_sweep), and P is
+        restored to it at the end of the run, and the method
+
+        + P.set_rng(rng), to use the random-number generator rng (see
+          anneal.rng)
+
+        Instead of P.MC_move(), P can include the methods
+
+        + P.propose(), preparing a MC move and returning its energy
+          change dE
+        + P.accept(), applying the move (and updating P.energy)
+        + P.reject(), discarding it
+
+        in which case the acceptance test is done by simulated_annealing
+        (and these methods are used even if P has MC_move or MC_sweep).
+        For rejection_free=True, P must include the methods
+
+        + P.local_moves(), returning the list of (move, dE) pairs for
+          all the moves from the current configuration (move being any
+          object, e.g. a tuple, and dE its energy change)
+        + P.apply_move(move), performing one of them (and updating
+          P.energy)
+
     ID : str
         Label for the problem under study.
     beta_min : float, optional
@@ -37,7 +425,7 @@ def simulated_annealing(P, ID, beta_min=1e-2, beta_max=1e2,
     beta_max: float, optional
         Maximum inverse temperature (default: 1e2)
     cooling_rate : float, optional
-        Cooling rate (default: 1e-2)
+        Cooling rate, for the default geometric schedule (default: 1e-2)
     n_steps_per_T : int, optional
         Number of MC moves attempted at each temperature (default: 100)
     E_min : float, optional
@@ -46,62 +434,378 @@ def simulated_annealing(P, ID, beta_min=1e-2, beta_max=1e2,
         If True, perform a T=0 quench at the end of the annealing
     n_steps_T0 : int, optional
         Number of MC moves after the T=0 quench
+    log : object, optional
+        Log sink, see anneal.logs (default: a TextLog writing to
+        log_sim_ann_<ID>.dat, flushed at each temperature)
+    checkpoint_file : str, optional
+        If given, a checkpoint of the run (P, E, random-number generator
+        states and parameters) is periodically written to this file, and
+        the run can be continued with resume_simulated_annealing
+        (default: None)
+    checkpoint_interval : int, optional
+        Number of temperature steps between two checkpoints (default: 100)
+    schedule : object, optional
+        Cooling schedule, see anneal.schedules (default: a
+        GeometricSchedule with the given cooling_rate, i.e. beta is
+        multiplied by 1 + cooling_rate at each step). Adaptive schedules
+        need the energy after each move, and then P.MC_sweep is not used.
+    equilibration : object, optional
+        Criterion to stop the MC moves at a given temperature before
+        n_steps_per_T moves are done, see anneal.equilibration (default:
+        None, always perform n_steps_per_T moves)
+    n_T_stagnation : int, optional
+        If given, stop the annealing loop after n_T_stagnation
+        temperatures without improvement of the lowest energy (default:
+        None)
+    instruments : Instruments, optional
+        If given, it collects the time spent in each phase of the run and
+        the numbers of proposed/accepted/rejected moves, and calls its
+        callbacks at the end of each temperature step, see
+        anneal.instruments (default: None)
+    rng : numpy.random.Generator, optional
+        Random-number generator for this run, passed to P.set_rng
+        (default: None, P keeps its own generator)
+    acceptance : object, optional
+        Acceptance test for problems with the propose/accept/reject
+        methods, with methods set_beta(beta) and accept(dE), returning
+        True if a move with energy change dE is accepted, see
+        anneal.metropolis (default: None, a Metropolis instance whose
+        random numbers are seeded by rng, or by P.rng if P keeps its
+        numpy generator there, or else by the global random module, and
+        which caches acceptance probabilities if P.energy is an integer)
+    rejection_free : bool or float, optional
+        If True, use the rejection-free (n-fold way) algorithm: at each
+        step, a move is chosen among all the P.local_moves() with
+        probability proportional to its Metropolis acceptance
+        probability, and the number of (rejected) proposals it replaces
+        is drawn at random, so that n_steps_per_T still counts
+        proposals. Each step costs a call to P.local_moves(), but no
+        work is spent on rejections, which pays off when few moves are
+        accepted. If a float, use the rejection-free algorithm only at
+        the temperatures following one whose acceptance ratio was below
+        this value, and the usual MC moves of P otherwise (default:
+        False)
 
     Returns
     -------
     P : object
-        Current version of P
-    E : list
-        List of the final energies for each temperature
+        Current version of P (or its lowest-energy version, if P has the
+        snapshot/restore methods)
+    E : Trace
+        Values of beta, energy, acceptance ratio, elapsed time, number of
+        MC moves and process CPU time at the end of each temperature step
+        (see anneal.trace.Trace); it can also be used as the list of the
+        final energies for each temperature
     elapsed_time : float
-        Total elapsed time, in seconds
+        Total elapsed (wall-clock) time, in seconds
+
+    '''
+    return _run_to_end(iter_simulated_annealing(
+        P, ID, beta_min=beta_min, beta_max=beta_max,
+        cooling_rate=cooling_rate, n_steps_per_T=n_steps_per_T, E_min=E_min,
+        quench_to_T0=quench_to_T0, n_steps_T0=n_steps_T0, log=log,
+        checkpoint_file=checkpoint_file,
+        checkpoint_interval=checkpoint_interval, schedule=schedule,
+        equilibration=equilibration, n_T_stagnation=n_T_stagnation,
+        instruments=instruments, rng=rng, acceptance=acceptance,
+        rejection_free=rejection_free))
+
+
+def iter_simulated_annealing(P, ID, beta_min=1e-2, beta_max=1e2,
+                             cooling_rate=1e-2, n_steps_per_T=100,
+                             E_min=-float('inf'),
+                             quench_to_T0=False, n_steps_T0=1000, log=None,
+                             checkpoint_file=None, checkpoint_interval=100,
+                             schedule=None, equilibration=None,
+                             n_T_stagnation=None, instruments=None,
+                             rng=None, acceptance=None,
+                             rejection_free=False):
+    '''
+    Iterator variant of simulated_annealing.
+
+    The parameters are the same as for simulated_annealing. P is
+    initialized (and the log is opened) by this call, and then each
+    iteration performs one temperature step.
 
+    Yields
+    ------
+    record : TemperatureRecord
+        Values of beta, energy, acceptance ratio, number of MC moves and
+        elapsed time at the end of each temperature step (and after the
+        T=0 quench, if any)
+
+    Returns
+    -------
+    P, E, elapsed_time
+        As for simulated_annealing, as the value of the final
+        StopIteration (e.g. the result of "yield from").
+
+    Notes
+    -----
+    The iteration can be stopped at any time by calling close() (e.g.
+    after breaking out of a for loop); then P is restored to its
+    lowest-energy configuration (if it has the snapshot/restore methods)
+    and the log is closed, as at the end of a complete run. Alternatively,
+    send(True) stops the annealing (without the T=0 quench) in the same
+    way, and raises the final StopIteration, with P, E and elapsed_time.
+    Time spent by the caller between iterations is not counted by
+    instruments.
     '''
     # initialize
-    time_start = time.clock()
+    time_start = time.perf_counter()
+    if rng is not None:
+        if not hasattr(P, 'set_rng'):
+            raise TypeError('rng was given, but P has no set_rng method.')
+        P.set_rng(rng)
+    if _has_propose(P):
+        if acceptance is None:
+            acceptance = _default_acceptance(P, rng)
+    elif acceptance is not None:
+        raise TypeError('acceptance was given, but P has no '
+                        'propose/accept/reject methods.')
+    if rejection_free:
+        if not _has_local_moves(P):
+            raise TypeError('rejection_free was given, but P has no '
+                            'local_moves/apply_move methods.')
+        if rejection_free is True:
+            rejection_free_below = float('inf')
+        else:
+            rejection_free_below = float(rejection_free)
+        rejection_free = seeded_random(_problem_rng(P, rng))
+    else:
+        rejection_free = rejection_free_below = None
     P.set_beta(beta_min)
-    E = []
-    out = open('log_sim_ann_%s.dat' % ID, 'w')
-    out.write('# start - %s\n' % time.strftime('%c'))
-    out.write('# beta_min: %f\n' % beta_min)
-    out.write('# beta_max: %f\n' % beta_max)
-    out.write('# cooling rate: %f\n' % cooling_rate)
-    out.write('# n_steps_per_T %f\n' % n_steps_per_T)
-    out.write('# initial energy: %f\n' % P.energy)
-    out.write('# quench_to_T0: %s\n' % quench_to_T0)
-    out.write('# n_steps_T0: %i\n' % n_steps_T0)
-    out.write('#\n')
-    out.flush()
-    # annealing loop
-    while P.beta < beta_max:
-        acc = 0
-        for step in range(n_steps_per_T):
-            acc += P.MC_move()
-        acc_ratio = acc / float(n_steps_per_T)
-        out.write('%10.4g  %10.4g %.8f\n' % (P.beta, P.energy, acc_ratio))
-        out.flush()
-        E.append(P.energy)
-        if P.energy <= E_min:
-            out.write('# reached E_min=%s. Break.\n' % E_min)
-            out.flush()
-            break
-        # update beta and MC parameters
-        P.set_beta(P.beta * (1.0 + cooling_rate))
-        P.update_MC_parameters(acc_ratio)
-    # T=0 quench
-    if quench_to_T0:
-        out.write('# start T=0 quench\n')
-        out.flush()
-        P.set_beta(1e24)
-        for step in range(n_steps_T0):
-            P.MC_move()
-        E.append(P.energy)
-        out.write('# %12.4g  %10.4g %.8f\n' % (P.beta, P.energy, acc_ratio))
-        out.write('# after quench, reached E=%g\n' % P.energy)
-        out.flush()
+    E = Trace()
+    if log is None:
+        log = TextLog('log_sim_ann_%s.dat' % ID)
+    log.comment('start - %s' % time.strftime('%c'))
+    log.comment('beta_min: %f' % beta_min)
+    log.comment('beta_max: %f' % beta_max)
+    if schedule is None:
+        schedule = GeometricSchedule(cooling_rate)
+        log.comment('cooling rate: %f' % cooling_rate)
+    else:
+        log.comment('schedule: %r' % schedule)
+    log.comment('n_steps_per_T %f' % n_steps_per_T)
+    log.comment('initial energy: %f' % P.energy)
+    log.comment('quench_to_T0: %s' % quench_to_T0)
+    log.comment('n_steps_T0: %i' % n_steps_T0)
+    log.comment('')
+    if equilibration is not None:
+        log.comment('equilibration: %r' % equilibration)
+    if n_T_stagnation is not None:
+        log.comment('n_T_stagnation: %i' % n_T_stagnation)
+    if acceptance is not None:
+        log.comment('acceptance: %r' % acceptance)
+    if rejection_free is not None:
+        if rejection_free_below < float('inf'):
+            log.comment('rejection-free (n-fold way) moves, for acceptance '
+                        'ratios below %g' % rejection_free_below)
+        else:
+            log.comment('rejection-free (n-fold way) moves')
+    settings = dict(ID=ID, beta_max=beta_max, schedule=schedule,
+                    equilibration=equilibration,
+                    n_T_stagnation=n_T_stagnation,
+                    n_steps_per_T=n_steps_per_T, E_min=E_min,
+                    quench_to_T0=quench_to_T0, n_steps_T0=n_steps_T0,
+                    checkpoint_file=checkpoint_file,
+                    checkpoint_interval=checkpoint_interval,
+                    acceptance=acceptance, rejection_free=rejection_free,
+                    rejection_free_below=rejection_free_below)
+    return _annealing_loop(P, E, log, time_start, settings, None,
+                           instruments)
+
+
+def resume_simulated_annealing(checkpoint_file, log=None, instruments=None):
+    '''
+    Resume a simulated-annealing run from a checkpoint.
+
+    The random-number generators are restored to their state at the time
+    of the checkpoint, and the annealing schedule continues from the
+    stored value of beta, with the original parameters. New checkpoints
+    are written to the same file.
+
+    Parameters
+    ----------
+    checkpoint_file : str
+        Checkpoint written by simulated_annealing.
+    log : object, optional
+        Log sink, see anneal.logs (default: a TextLog appending to
+        log_sim_ann_<ID>.dat, flushed at each temperature)
+    instruments : Instruments, optional
+        As for simulated_annealing (default: None)
+
+    Returns
+    -------
+    P, E, elapsed_time
+        As for simulated_annealing; E and elapsed_time also include the
+        part of the run before the checkpoint.
+
+    '''
+    checkpoint = load_checkpoint(checkpoint_file)
+    settings = checkpoint['settings']
+    settings['checkpoint_file'] = checkpoint_file
+    set_rng_state(checkpoint['rng_state'])
+    P, E = checkpoint['P'], checkpoint['E']
+    time_start = time.perf_counter() - checkpoint['elapsed_time']
+    if log is None:
+        log = TextLog('log_sim_ann_%s.dat' % settings['ID'], mode='a')
+    log.comment('resume from %s - %s' % (checkpoint_file,
+                                         time.strftime('%c')))
+    return _run_to_end(_annealing_loop(P, E, log, time_start, settings,
+                                       checkpoint['best_state'],
+                                       instruments,
+                                       checkpoint.get('best_energy')))
+
+
+def _run_to_end(records):
+    '''
+    Exhaust the iterator records, and return its return value.
+    '''
+    while True:
+        try:
+            next(records)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _annealing_loop(P, E, log, time_start, settings, best_state,
+                    instruments, best_energy=None):
+    '''
+    Annealing loop (starting from the current value of P.beta), T=0
+    quench and finalization, shared by simulated_annealing and
+    resume_simulated_annealing. This is a generator, which yields a
+    TemperatureRecord after each temperature step and returns P, E and
+    the elapsed time.
+    '''
+    beta_max = settings['beta_max']
+    schedule = settings['schedule']
+    n_steps_per_T = settings['n_steps_per_T']
+    E_min = settings['E_min']
+    checkpoint_file = settings['checkpoint_file']
+    checkpoint_interval = settings['checkpoint_interval']
+    equilibration = settings['equilibration']
+    n_T_stagnation = settings['n_T_stagnation']
+    # lowest-energy configuration so far
+    if hasattr(P, 'snapshot') and hasattr(P, 'restore'):
+        if best_energy is None:
+            best_energy = min(E) if best_state is not None else float('inf')
+        best = _BestState(P, best_energy, best_state)
+    else:
+        best = None
+    moves = _moves(P, settings.get('acceptance'), best)
+    if settings.get('rejection_free') is not None:
+        threshold = settings['rejection_free_below']
+        moves = _RejectionFreeMoves(
+            P, settings['rejection_free'],
+            fallback=moves if threshold < float('inf') else None,
+            threshold=threshold,
+            acc_ratio=E.column('acc_ratio')[-1] if len(E) else 1.0,
+            best=best)
+    # lowest energy at the end of a temperature step, and number of
+    # temperatures since it was found (for n_T_stagnation)
+    if len(E):
+        E_best = min(E)
+        n_T_since_best = len(E) - 1 - list(E).index(E_best)
+    else:
+        E_best = float('inf')
+        n_T_since_best = 0
+    # process CPU time, including the part of the run before a checkpoint
+    if len(E):
+        cpu_start = time.process_time() - E.column('cpu_time')[-1]
+    else:
+        cpu_start = time.process_time()
+    if instruments is not None:
+        instruments.start()
+    stop = False
+    try:
+        # annealing loop
+        while P.beta < beta_max:
+            n_steps, acc, E_mean, E_var = _temperature_step(
+                moves, n_steps_per_T, schedule.needs_energy_stats,
+                equilibration, best)
+            if instruments is not None:
+                instruments.lap('MC_moves')
+                instruments.count(n_steps, acc)
+            acc_ratio = acc / float(n_steps)
+            elapsed_time = time.perf_counter() - time_start
+            log.record(P.beta, P.energy, acc_ratio)
+            E.append(P.beta, P.energy, acc_ratio, elapsed_time, n_steps,
+                     time.process_time() - cpu_start)
+            record = TemperatureRecord(P.beta, P.energy, acc_ratio, n_steps,
+                                       elapsed_time)
+            if instruments is not None:
+                instruments.lap('log')
+                instruments.end_temperature(P, record)
+            stop = yield record
+            if instruments is not None:
+                instruments.start()
+            if stop:
+                log.comment('stopped by the caller')
+                break
+            if P.energy <= E_min:
+                log.comment('reached E_min=%s. Break.' % E_min)
+                break
+            if best is not None:
+                # for the moves done by P.MC_sweep, which are not tracked
+                best.update()
+            if P.energy < E_best:
+                E_best = P.energy
+                n_T_since_best = 0
+            else:
+                n_T_since_best += 1
+            if n_T_stagnation is not None and n_T_since_best >= n_T_stagnation:
+                log.comment('no improvement for %i temperatures. Break.' %
+                            n_T_since_best)
+                break
+            if instruments is not None:
+                instruments.lap('snapshot')
+            # update beta and MC parameters
+            P.set_beta(schedule.next_beta(P.beta, acc_ratio, E_mean, E_var))
+            if instruments is not None:
+                instruments.lap('schedule')
+            P.update_MC_parameters(acc_ratio)
+            if instruments is not None:
+                instruments.lap('update_MC_parameters')
+            if checkpoint_file and len(E) % checkpoint_interval == 0:
+                if best is not None:
+                    best_state, best_energy = best.state, best.energy
+                save_checkpoint(checkpoint_file, P, E,
+                                time.perf_counter() - time_start, settings,
+                                best_state, best_energy)
+                if instruments is not None:
+                    instruments.lap('checkpoint')
+        # T=0 quench
+        if settings['quench_to_T0'] and not stop:
+            log.comment('start T=0 quench')
+            P.set_beta(1e24)
+            n_steps_T0 = settings['n_steps_T0']
+            acc = _MC_moves(moves, n_steps_T0, best)
+            if best is not None:
+                best.update()
+            acc_ratio = acc / float(max(n_steps_T0, 1))
+            E.append(P.beta, P.energy, acc_ratio,
+                     time.perf_counter() - time_start, n_steps_T0,
+                     time.process_time() - cpu_start)
+            log.comment('%12.4g  %10.4g %.8f' % (P.beta, P.energy, acc_ratio))
+            log.comment('after quench, reached E=%g' % P.energy)
+            if instruments is not None:
+                instruments.lap('quench')
+                instruments.count(n_steps_T0, acc)
+            yield TemperatureRecord(P.beta, P.energy, acc_ratio, n_steps_T0,
+                                    E.column('time')[-1])
+    except GeneratorExit:
+        log.comment('stopped by the caller')
+    # go back to the lowest-energy configuration
+    if best is not None and best.energy < P.energy:
+        P.restore(best.state)
+        log.comment('restored lowest-energy configuration, E=%g' % P.energy)
     # finalize
-    out.write('# end\n')
-    elapsed_time = time.clock() - time_start
-    out.write('# elapsed: %.2f s\n' % elapsed_time)
-    out.close()
+    if instruments is not None:
+        log.comment(instruments.summary())
+    log.comment('end')
+    elapsed_time = time.perf_counter() - time_start
+    log.comment('elapsed: %.2f s' % elapsed_time)
+    log.comment('cpu time: %.2f s' % (time.process_time() - cpu_start))
+    log.close()
     return P, E, elapsed_time
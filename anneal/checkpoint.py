@@ -0,0 +1,80 @@
+'''Checkpoints for anneal.
+
+This module contains the functions used by simulated_annealing to save
+and load checkpoints of a run, and to store and restore the state of the
+random-number generators.
+'''
+
+import os
+import pickle
+import random
+import sys
+
+__all__ = ['save_checkpoint', 'load_checkpoint',
+           'get_rng_state', 'set_rng_state']
+
+
+def get_rng_state():
+    '''
+    Return the states of the global random-number generators (those of
+    the random module and, if it was imported, of numpy.random).
+    '''
+    state = {'random': random.getstate()}
+    if 'numpy' in sys.modules:
+        state['numpy'] = sys.modules['numpy'].random.get_state()
+    return state
+
+
+def set_rng_state(state):
+    '''
+    Restore the states returned by get_rng_state.
+    '''
+    random.setstate(state['random'])
+    if 'numpy' in state:
+        import numpy
+        numpy.random.set_state(state['numpy'])
+
+
+def save_checkpoint(filename, P, E, elapsed_time, settings, best_state=None,
+                    best_energy=None):
+    '''
+    Pickle the state of a run into filename.
+
+    The file is first written to a temporary path and then renamed, so
+    that an interrupted write never corrupts the previous checkpoint.
+
+    Parameters
+    ----------
+    filename : str
+        Checkpoint file.
+    P : object
+        Current version of the problem instance (with beta already set to
+        the next value of the schedule).
+    E : Trace
+        Trace of the run so far.
+    elapsed_time : float
+        Elapsed time so far, in seconds.
+    settings : dict
+        Parameters of the run.
+    best_state : object, optional
+        Snapshot of the lowest-energy configuration so far (default: None)
+    best_energy : float, optional
+        Energy of best_state (default: None)
+    '''
+    checkpoint = {'P': P, 'E': E, 'elapsed_time': elapsed_time,
+                  'settings': settings, 'rng_state': get_rng_state(),
+                  'best_state': best_state, 'best_energy': best_energy}
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as f:
+        pickle.dump(checkpoint, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_filename, filename)
+
+
+def load_checkpoint(filename):
+    '''
+    Load a checkpoint written by save_checkpoint, and return it as a
+    dictionary with keys P, E, elapsed_time, settings, rng_state,
+    best_state and best_energy.
+    '''
+    with open(filename, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,255 @@
+'''Command-line runner for anneal.
+
+This module contains the functions behind
+
+    python -m anneal config.toml
+
+which loads a problem class by its import path, takes the parameters of
+simulated_annealing from a TOML (or JSON) configuration file, performs a
+batch of independent runs (possibly for each point of a parameter sweep)
+over a pool of worker processes, and writes the consolidated results to a
+JSON file.
+
+A configuration file reads, for instance,
+
+    problem = "lib_sudoku:Sudoku"      # import path of the problem class
+    path = ["examples/sudoku"]         # added to sys.path (optional)
+    ID = "sudoku"                      # label (default: file name)
+    n_runs = 8                         # runs per sweep point (default: 1)
+    seed = 0                           # base seed (default: 0)
+    n_workers = 4                      # default: all cores; 1 is serial
+    log = "none"                       # "none", "text" or "npy"
+    output = "sudoku_results.json"     # default: <ID>_results.json
+
+    [problem_args]                     # keyword arguments for the class
+    input_file = "examples/sudoku/puzzle.dat"
+
+    [annealing]                        # arguments of simulated_annealing
+    beta_min = 0.1
+    beta_max = 500.0
+    n_steps_per_T = 1000
+    E_min = 0
+
+    [sweep]                            # optional: grid of parameters
+    cooling_rate = [0.01, 0.001]
+
+Tables with a "class" key, as
+
+    schedule = {class = "LamSchedule", lam = 0.1}
+
+are instantiated in each run, with the other keys as keyword arguments;
+names without a module are looked up in the anneal package. Relative paths
+are relative to the current directory.
+'''
+
+from __future__ import print_function
+
+import argparse
+import functools
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .logs import _check_run_log, _run_log
+from .multistart import _single_run
+from .rng import _spawn_rngs_if_available
+from .tuning import _grid
+from .version import __version__
+
+__all__ = ['load_config', 'run_config', 'main']
+
+
+def load_config(filename):
+    '''
+    Read a configuration file, in TOML (.toml) or JSON (any other
+    extension) format, and return it as a dict.
+
+    TOML files require python >= 3.11 (or the tomli package).
+    '''
+    if filename.endswith('.toml'):
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError('Reading %s requires python >= 3.11 or '
+                                  'the tomli package' % filename)
+        with open(filename, 'rb') as f:
+            config = tomllib.load(f)
+    else:
+        with open(filename) as f:
+            config = json.load(f)
+    if 'problem' not in config:
+        raise ValueError('%s: missing "problem" entry' % filename)
+    return config
+
+
+def _import_object(name, default_module=None):
+    '''
+    Return the object with import path name, as "module:attr" or
+    "module.attr"; a bare name is looked up in default_module.
+    '''
+    if ':' in name:
+        module_name, attr = name.split(':', 1)
+    elif '.' in name:
+        module_name, attr = name.rsplit('.', 1)
+    elif default_module is not None:
+        module_name, attr = default_module, name
+    else:
+        raise ValueError('Invalid import path: %r' % name)
+    obj = importlib.import_module(module_name)
+    for part in attr.split('.'):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _build(value):
+    '''
+    Instantiate the tables with a "class" key, leave other values as
+    they are.
+    '''
+    if isinstance(value, dict) and 'class' in value:
+        kwargs = dict((key, _build(val)) for key, val in value.items()
+                      if key != 'class')
+        return _import_object(value['class'], 'anneal')(**kwargs)
+    return value
+
+
+def _run_job(problem, path, problem_args, label, seed, rng, kwargs, log):
+    '''
+    Perform a single run, and return its results as a dict.
+    '''
+    for folder in reversed(path):
+        if folder not in sys.path:
+            sys.path.insert(0, folder)
+    factory = functools.partial(_import_object(problem), **problem_args)
+    kwargs = dict((key, _build(val)) for key, val in kwargs.items())
+    kwargs['log'] = _run_log(log, label)
+    P, E, elapsed_time = _single_run(factory, label, seed, rng, kwargs)
+    return {'label': label,
+            'seed': seed,
+            'energy': float(P.energy),
+            'energy_last': float(E[-1]),
+            'n_temperatures': len(E),
+            'n_steps': int(sum(E.column('n_steps'))),
+            'elapsed_time': elapsed_time}
+
+
+def run_config(config, n_workers=None, verbose=False):
+    '''
+    Perform the runs described by a configuration (see load_config and
+    the module docstring), and return the consolidated results.
+
+    Parameters
+    ----------
+    config : dict
+        Configuration.
+    n_workers : int, optional
+        Number of worker processes, overriding the n_workers entry of the
+        configuration (default: None)
+    verbose : bool, optional
+        If True, print a summary line for each sweep point (default:
+        False)
+
+    Returns
+    -------
+    results : dict
+        JSON-serializable dict, with entries config, anneal_version,
+        date, elapsed_time, runs (one dict per run, with sweep-point
+        parameters, label, seed, final and last-logged energy, number of
+        temperature steps and MC moves, elapsed time) and points (one dict
+        per sweep point, with parameters, number of runs, lowest and mean
+        final energy, mean elapsed time).
+    '''
+    time_start = time.perf_counter()
+    ID = config.get('ID', 'anneal')
+    n_runs = config.get('n_runs', 1)
+    seed = config.get('seed', 0)
+    log = config.get('log', 'none')
+    _check_run_log(log)
+    if n_workers is None:
+        n_workers = config.get('n_workers')
+    path = [os.path.abspath(folder) for folder in config.get('path', [])]
+    points = _grid(config.get('sweep', {}))
+    n_jobs = len(points) * n_runs
+    rngs = _spawn_rngs_if_available(seed, n_jobs)
+    jobs = []
+    for ind_point, params in enumerate(points):
+        kwargs = dict(config.get('annealing', {}))
+        kwargs.update(params)
+        for run in range(n_runs):
+            ind = ind_point * n_runs + run
+            label = '%s_%i_%i' % (ID, ind_point, run)
+            jobs.append((config['problem'], path,
+                         config.get('problem_args', {}), label, seed + ind,
+                         rngs[ind], kwargs, log))
+    if n_workers == 1:
+        runs = [_run_job(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(_run_job, *job) for job in jobs]
+            runs = [future.result() for future in futures]
+    summary = []
+    for ind_point, params in enumerate(points):
+        point_runs = runs[ind_point * n_runs:(ind_point + 1) * n_runs]
+        energies = [run['energy'] for run in point_runs]
+        for run in point_runs:
+            run['params'] = params
+        summary.append({
+            'params': params,
+            'n_runs': n_runs,
+            'energy_min': min(energies),
+            'energy_mean': sum(energies) / n_runs,
+            'elapsed_time_mean': sum(run['elapsed_time']
+                                     for run in point_runs) / n_runs})
+        if verbose:
+            print('[anneal] %s E_min=%g E_mean=%g t_mean=%.3g s' % (
+                json.dumps(params, sort_keys=True),
+                summary[-1]['energy_min'], summary[-1]['energy_mean'],
+                summary[-1]['elapsed_time_mean']))
+    return {'config': config,
+            'anneal_version': __version__,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'elapsed_time': time.perf_counter() - time_start,
+            'runs': runs,
+            'points': summary}
+
+
+def main(argv=None):
+    '''
+    Entry point of python -m anneal.
+    '''
+    parser = argparse.ArgumentParser(
+        prog='python -m anneal',
+        description='Run batches of simulated-annealing runs, as described '
+                    'by a TOML or JSON configuration file.')
+    parser.add_argument('config', help='configuration file')
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help='number of worker processes (1: serial)')
+    parser.add_argument('--n-runs', type=int, default=None,
+                        help='number of runs per sweep point')
+    parser.add_argument('--output', default=None,
+                        help='output JSON file (default: <ID>_results.json)')
+    parser.add_argument('--quiet', action='store_true',
+                        help='do not print the summary')
+    args = parser.parse_args(argv)
+    config = load_config(args.config)
+    config.setdefault('ID', os.path.splitext(
+        os.path.basename(args.config))[0])
+    if args.n_runs is not None:
+        config['n_runs'] = args.n_runs
+    output = args.output or config.get('output',
+                                       '%s_results.json' % config['ID'])
+    results = run_config(config, n_workers=args.n_workers,
+                         verbose=not args.quiet)
+    with open(output, 'w') as out:
+        json.dump(results, out, indent=2, sort_keys=True)
+        out.write('\n')
+    if not args.quiet:
+        print('[anneal] %i runs, results written to %s' % (
+            len(results['runs']), output))
+    return results
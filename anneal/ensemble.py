@@ -0,0 +1,160 @@
+'''Ensemble annealing for anneal.
+
+This module contains ensemble_annealing, which anneals K independent
+walkers in lock-step, for problems whose energy and Monte Carlo proposals
+can be expressed as operations on numpy arrays.
+'''
+
+import time
+
+from .logs import TextLog
+from .schedules import GeometricSchedule
+from .trace import Trace
+
+__all__ = ['ensemble_annealing']
+
+
+def _ensemble_moves(P, beta, step, n_steps, rng):
+    '''
+    Perform n_steps vectorized Metropolis moves for all walkers, and
+    return the number of accepted moves of each walker.
+    '''
+    import numpy
+    acc = numpy.zeros(len(P.energies), dtype=int)
+    for ind in range(n_steps):
+        x_new = P.propose(P.x, step)
+        E_new = P.compute_energies(x_new)
+        dE = E_new - P.energies
+        with numpy.errstate(over='ignore'):
+            accepted = ((dE <= 0.0) |
+                        (rng.random(dE.shape) <
+                         numpy.exp(- beta * dE)))
+        P.x[accepted] = x_new[accepted]
+        P.energies[accepted] = E_new[accepted]
+        acc += accepted
+    return acc
+
+
+def ensemble_annealing(P, ID, beta_min=1e-2, beta_max=1e2,
+                       cooling_rate=1e-2, n_steps_per_T=100,
+                       E_min=-float('inf'), quench_to_T0=False,
+                       n_steps_T0=1000, step=1.0, step_min=0.0,
+                       step_max=float('inf'), log=None, schedule=None,
+                       rng=None):
+    '''
+    Simulated annealing of an ensemble of K walkers, moved in lock-step.
+
+    Parameters
+    ----------
+    P : object
+        Instance of a custom class, which includes attributes
+
+        + P.x, a numpy array of shape (K, ...) with the configurations of
+          the K walkers
+        + P.energies, a numpy array of shape (K,) with their energies
+
+        and methods:
+
+        + P.compute_energies(x), returning the energies of the
+          configurations x (an array of the same shape as P.x)
+        + P.propose(x, step), returning an array of proposed
+          configurations, given the current ones and the step sizes of
+          the walkers (an array of shape (K,))
+
+        Metropolis acceptance is performed by ensemble_annealing. If P
+        has a set_rng(rng) method, it is called with the generator rng.
+    ID : str
+        Label for the problem under study.
+    beta_min, beta_max, cooling_rate, n_steps_per_T, E_min : optional
+        As for simulated_annealing; the annealing stops when any walker
+        reaches E_min.
+    quench_to_T0, n_steps_T0 : optional
+        As for simulated_annealing.
+    step : float or array, optional
+        Initial step size of the walkers (default: 1.0)
+    step_min, step_max : float, optional
+        Bounds for the step sizes, which are decreased by a factor 1.1
+        when the acceptance ratio of a walker is below 0.2 and increased
+        by 1.1 when it is above 0.8 (default: 0.0, infinity)
+    log : object, optional
+        Log sink, see anneal.logs; lowest energy and mean acceptance
+        ratio are logged (default: a TextLog writing to
+        log_ens_ann_<ID>.dat)
+    schedule : object, optional
+        Cooling schedule, see anneal.schedules; mean and variance of the
+        energy are computed over the walkers (default: a
+        GeometricSchedule with the given cooling_rate)
+    rng : numpy.random.Generator, optional
+        Random-number generator for the Metropolis test, also passed to
+        P.set_rng (default: None, use the global numpy.random functions)
+
+    Returns
+    -------
+    P : object
+        Final version of P
+    E : Trace
+        Values of beta, lowest energy, mean acceptance ratio, elapsed
+        time, number of MC moves per walker and process CPU time at the
+        end of each temperature step
+    elapsed_time : float
+        Total elapsed time, in seconds
+
+    '''
+    import numpy
+    # initialize
+    time_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if rng is None:
+        rng = numpy.random
+    elif hasattr(P, 'set_rng'):
+        P.set_rng(rng)
+    P.energies = numpy.asarray(P.compute_energies(P.x), dtype=float)
+    n_walkers = len(P.energies)
+    step = numpy.ones(n_walkers) * step
+    if schedule is None:
+        schedule = GeometricSchedule(cooling_rate)
+    beta = beta_min
+    E = Trace()
+    if log is None:
+        log = TextLog('log_ens_ann_%s.dat' % ID)
+    log.comment('start - %s' % time.strftime('%c'))
+    log.comment('walkers: %i' % n_walkers)
+    log.comment('beta_min: %f' % beta_min)
+    log.comment('beta_max: %f' % beta_max)
+    log.comment('schedule: %r' % schedule)
+    log.comment('n_steps_per_T %f' % n_steps_per_T)
+    log.comment('lowest initial energy: %f' % P.energies.min())
+    log.comment('')
+    # annealing loop
+    while beta < beta_max:
+        acc = _ensemble_moves(P, beta, step, n_steps_per_T, rng)
+        acc_ratios = acc / float(n_steps_per_T)
+        acc_ratio = acc_ratios.mean()
+        E_lowest = P.energies.min()
+        log.record(beta, E_lowest, acc_ratio)
+        E.append(beta, E_lowest, acc_ratio, time.perf_counter() - time_start,
+                 n_steps_per_T, time.process_time() - cpu_start)
+        if E_lowest <= E_min:
+            log.comment('reached E_min=%s. Break.' % E_min)
+            break
+        # update beta and step sizes
+        beta = schedule.next_beta(beta, acc_ratio, P.energies.mean(),
+                                  P.energies.var())
+        step[(acc_ratios < 0.2) & (step > step_min)] *= 0.90909090909090909090
+        step[(acc_ratios > 0.8) & (step < step_max)] *= 1.1
+    # T=0 quench
+    if quench_to_T0:
+        log.comment('start T=0 quench')
+        acc = _ensemble_moves(P, 1e24, step, n_steps_T0, rng)
+        acc_ratio = acc.mean() / float(max(n_steps_T0, 1))
+        E.append(1e24, P.energies.min(), acc_ratio,
+                 time.perf_counter() - time_start, n_steps_T0,
+                 time.process_time() - cpu_start)
+        log.comment('after quench, reached E=%g' % P.energies.min())
+    # finalize
+    log.comment('end')
+    elapsed_time = time.perf_counter() - time_start
+    log.comment('elapsed: %.2f s' % elapsed_time)
+    log.comment('cpu time: %.2f s' % (time.process_time() - cpu_start))
+    log.close()
+    return P, E, elapsed_time
@@ -0,0 +1,73 @@
+'''Equilibration criteria for anneal.
+
+This module contains the criteria which simulated_annealing can use to
+stop the MC moves at a given temperature before n_steps_per_T moves are
+done. Moves are performed in blocks of block_size moves, and a criterion
+is an object with the attributes block_size and min_steps, and the method
+
+    + converged(acc_ratios, energies): return True if the system is
+      equilibrated, given the acceptance ratio of each block and the
+      energy at the end of each block (at the current temperature)
+
+which is only called after at least min_steps moves.
+'''
+
+import math
+
+__all__ = ['EnergyEquilibration', 'AcceptanceEquilibration']
+
+
+class EnergyEquilibration(object):
+    '''
+    Energy-fluctuation criterion: the system is equilibrated when the mean
+    energy over the last window blocks differs from the one over the
+    previous window blocks by less than tol times the standard deviation
+    of the energy over these 2*window blocks.
+    '''
+
+    def __init__(self, block_size=10, min_steps=0, window=5, tol=0.5):
+        self.block_size = block_size
+        self.min_steps = min_steps
+        self.window = window
+        self.tol = tol
+
+    def converged(self, acc_ratios, energies):
+        w = self.window
+        if len(energies) < 2 * w:
+            return False
+        last = energies[-2 * w:]
+        mean_1 = sum(last[:w]) / float(w)
+        mean_2 = sum(last[w:]) / float(w)
+        mean = 0.5 * (mean_1 + mean_2)
+        std = math.sqrt(sum((E - mean) ** 2 for E in last) / (2.0 * w))
+        return abs(mean_2 - mean_1) <= self.tol * std
+
+    def __repr__(self):
+        return ('EnergyEquilibration(block_size=%i, min_steps=%i, '
+                'window=%i, tol=%g)' % (self.block_size, self.min_steps,
+                                        self.window, self.tol))
+
+
+class AcceptanceEquilibration(object):
+    '''
+    Acceptance-window criterion: the system is considered frozen (at the
+    current temperature) when the acceptance ratio over the last window
+    blocks is smaller than acc_min.
+    '''
+
+    def __init__(self, block_size=10, min_steps=0, window=5, acc_min=1e-3):
+        self.block_size = block_size
+        self.min_steps = min_steps
+        self.window = window
+        self.acc_min = acc_min
+
+    def converged(self, acc_ratios, energies):
+        w = self.window
+        if len(acc_ratios) < w:
+            return False
+        return sum(acc_ratios[-w:]) / float(w) < self.acc_min
+
+    def __repr__(self):
+        return ('AcceptanceEquilibration(block_size=%i, min_steps=%i, '
+                'window=%i, acc_min=%g)' % (self.block_size, self.min_steps,
+                                            self.window, self.acc_min))
@@ -0,0 +1,92 @@
+'''Instrumentation for anneal.
+
+This module contains the Instruments class, which simulated_annealing can
+use to time the phases of the annealing loop, count MC moves and call
+user-defined functions at the end of each temperature step.
+'''
+
+import collections
+import time
+
+__all__ = ['Instruments', 'TemperatureRecord']
+
+
+TemperatureRecord = collections.namedtuple(
+    'TemperatureRecord', ['beta', 'energy', 'acc_ratio', 'n_steps', 'elapsed'])
+TemperatureRecord.__doc__ = '''
+State of a run at the end of a temperature step (elapsed is the elapsed
+time since the start of the run, in seconds).
+'''
+
+
+class Instruments(object):
+    '''
+    Timers, counters and callbacks for simulated_annealing.
+
+    When simulated_annealing is called without instruments, none of this
+    is done.
+
+    Attributes
+    ----------
+    timers : dict
+        Total time (in seconds) spent in each phase of the run: MC_moves,
+        log (logging and trace), snapshot, schedule, update_MC_parameters,
+        checkpoint, callbacks and quench.
+    n_temperatures : int
+        Number of temperature steps.
+    n_proposed, n_accepted, n_rejected : int
+        Number of proposed, accepted and rejected MC moves (including
+        those of the T=0 quench).
+    callbacks : list
+        Functions called as callback(P, record) at the end of each
+        temperature step, where record is a TemperatureRecord.
+
+    Methods
+    -------
+    summary()
+        Return a one-line summary of timers and counters.
+    '''
+
+    phases = ('MC_moves', 'log', 'snapshot', 'schedule',
+              'update_MC_parameters', 'checkpoint', 'callbacks', 'quench')
+
+    def __init__(self, callbacks=()):
+        self.timers = dict((phase, 0.0) for phase in self.phases)
+        self.n_temperatures = 0
+        self.n_proposed = 0
+        self.n_accepted = 0
+        self.callbacks = list(callbacks)
+        self._t_last = None
+
+    @property
+    def n_rejected(self):
+        return self.n_proposed - self.n_accepted
+
+    def start(self):
+        self._t_last = time.perf_counter()
+
+    def lap(self, phase):
+        '''
+        Add the time since the previous lap (or start) to phase.
+        '''
+        t = time.perf_counter()
+        self.timers[phase] += t - self._t_last
+        self._t_last = t
+
+    def count(self, n_steps, acc):
+        self.n_proposed += n_steps
+        self.n_accepted += acc
+
+    def end_temperature(self, P, record):
+        self.n_temperatures += 1
+        for callback in self.callbacks:
+            callback(P, record)
+        self.lap('callbacks')
+
+    def summary(self):
+        timers = ' '.join('%s=%.4g' % (phase, self.timers[phase])
+                          for phase in self.phases)
+        return ('proposed=%i accepted=%i rejected=%i temperatures=%i '
+                'timers[s]: %s' % (self.n_proposed, self.n_accepted,
+                                   self.n_rejected, self.n_temperatures,
+                                   timers))
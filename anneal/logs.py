@@ -0,0 +1,187 @@
+'''Log sinks for anneal.
+
+This module contains the classes which simulated_annealing can use to log
+a run. Each of them has the methods
+
+    + comment(line): log a free-text line
+    + record(beta, energy, acc_ratio): log the state at the end of a
+      temperature step
+    + close(): finalize the log
+'''
+
+import array
+import struct
+import sys
+
+__all__ = ['TextLog', 'NpyLog', 'NullLog']
+
+
+class TextLog(object):
+    '''
+    Text log, with one line per temperature step.
+
+    Attributes
+    ----------
+    filename : str
+        Name of the output file.
+    flush_interval : int
+        The file is flushed every flush_interval temperature steps (if 1,
+        after each step; if 0, only when it is closed).
+    mode : str
+        Mode for opening the file ('w' to overwrite, 'a' to append).
+    '''
+
+    def __init__(self, filename, flush_interval=1, mode='w'):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        self.mode = mode
+        self._n_records = 0
+        self._out = open(filename, mode)
+
+    def comment(self, line):
+        self._out.write(('# %s' % line).rstrip() + '\n')
+        if self.flush_interval == 1:
+            self._out.flush()
+
+    def record(self, beta, energy, acc_ratio):
+        self._out.write('%10.4g  %10.4g %.8f\n' % (beta, energy, acc_ratio))
+        self._n_records += 1
+        if self.flush_interval and self._n_records % self.flush_interval == 0:
+            self._out.flush()
+
+    def close(self):
+        self._out.close()
+
+
+class NpyLog(object):
+    '''
+    Binary log, with one .npy file per field: <prefix>_beta.npy,
+    <prefix>_energy.npy and <prefix>_acc_ratio.npy, each holding an array
+    of doubles (read them back with numpy.load, or all together with
+    NpyLog.load(prefix)).
+
+    Records are appended to the files every flush_interval temperature
+    steps, and the array headers are updated at the same time, so that
+    the files can be read even if the run is interrupted. Comments are
+    discarded.
+
+    Attributes
+    ----------
+    prefix : str
+        Prefix of the output files.
+    filenames : dict
+        Name of the output file for each field.
+    flush_interval : int
+        The records are written every flush_interval temperature steps
+        (if 1, after each step; if 0, only when the log is closed).
+    '''
+
+    fields = ('beta', 'energy', 'acc_ratio')
+    # fixed size of the .npy header (format version 1.0), so that it can
+    # be rewritten in place
+    _header_size = 128
+
+    def __init__(self, prefix, flush_interval=1):
+        self.prefix = prefix
+        self.filenames = dict((name, '%s_%s.npy' % (prefix, name))
+                              for name in self.fields)
+        self.flush_interval = flush_interval
+        self._n_written = 0
+        self._buffers = [array.array('d') for name in self.fields]
+        self._files = [open(self.filenames[name], 'wb')
+                       for name in self.fields]
+        for f in self._files:
+            f.write(self._header(0))
+            f.flush()
+
+    @classmethod
+    def _header(cls, n):
+        byte_order = '<' if sys.byteorder == 'little' else '>'
+        header = ("{'descr': '%sf8', 'fortran_order': False, "
+                  "'shape': (%i,), }" % (byte_order, n))
+        header = header.ljust(cls._header_size - 11) + '\n'
+        return (b'\x93NUMPY\x01\x00' +
+                struct.pack('<H', len(header)) + header.encode('latin1'))
+
+    @classmethod
+    def load(cls, prefix):
+        '''
+        Return a dict with the array of each field, for the files written
+        with the given prefix.
+        '''
+        import numpy
+        return dict((name, numpy.load('%s_%s.npy' % (prefix, name)))
+                    for name in cls.fields)
+
+    def comment(self, line):
+        pass
+
+    def record(self, beta, energy, acc_ratio):
+        for buf, value in zip(self._buffers, (beta, energy, acc_ratio)):
+            buf.append(value)
+        if (self.flush_interval and
+                len(self._buffers[0]) >= self.flush_interval):
+            self._write()
+
+    def _write(self):
+        n_written = self._n_written + len(self._buffers[0])
+        for f, buf in zip(self._files, self._buffers):
+            # data first, then the header which makes it visible
+            f.seek(0, 2)
+            f.write(buf.tobytes())
+            f.seek(0)
+            f.write(self._header(n_written))
+            f.flush()
+            del buf[:]
+        self._n_written = n_written
+
+    def close(self):
+        self._write()
+        for f in self._files:
+            f.close()
+
+
+class NullLog(object):
+    '''
+    Log which discards everything.
+    '''
+
+    def comment(self, line):
+        pass
+
+    def record(self, beta, energy, acc_ratio):
+        pass
+
+    def close(self):
+        pass
+
+
+# logs of the runs of multistart_annealing and of the command-line runner,
+# by name, built from the label of each run
+_LOGS = {'none': lambda label: NullLog(),
+         'text': lambda label: TextLog('log_sim_ann_%s.dat' % label),
+         'npy': lambda label: NpyLog('log_sim_ann_%s' % label)}
+
+
+def _check_run_log(log):
+    '''
+    Check that log is the name of a log in _LOGS, or a callable.
+    '''
+    if isinstance(log, str):
+        if log not in _LOGS:
+            raise ValueError('Unknown log type %r (valid: %s)'
+                             % (log, ', '.join(sorted(_LOGS))))
+    elif not callable(log):
+        raise TypeError('log must be a log type (%s), or a callable which '
+                        'returns the log of the run with a given label.'
+                        % ', '.join(sorted(_LOGS)))
+
+
+def _run_log(log, label):
+    '''
+    Return the log of the run with the given label, for log given as in
+    _check_run_log.
+    '''
+    if isinstance(log, str):
+        return _LOGS[log](label)
+    return log(label)
@@ -0,0 +1,144 @@
+'''Metropolis acceptance for anneal.
+
+This module contains the Metropolis class, a reusable implementation of
+the Metropolis acceptance test for the MC_move method of problem classes.
+Since beta stays fixed for many moves, the acceptance probabilities
+exp(-beta*dE) can be cached when dE only takes a few (e.g. integer)
+values, and the uniform random numbers can be drawn in blocks.
+'''
+
+import math
+import random
+
+__all__ = ['Metropolis']
+
+
+class Metropolis(object):
+    '''
+    Metropolis acceptance test, with cached exponentials and uniform
+    random numbers drawn in blocks.
+
+    Parameters
+    ----------
+    beta : float, optional
+        Inverse temperature (default: 0.0)
+    rng : numpy.random.Generator or random.Random, optional
+        Source of the uniform random numbers; a numpy Generator fills
+        each block with a single call (default: None, a new
+        numpy.random.default_rng(), or a random.Random if numpy is not
+        available)
+    discrete : bool, optional
+        If True, the values of exp(-beta*dE) are cached for each dE, until
+        beta changes (or the cache holds more than 4096 values); only use
+        it when dE takes few distinct values, as for integer energies
+        (default: False)
+    block_size : int, optional
+        Number of uniform random numbers drawn at once (default: 1024)
+
+    Methods
+    -------
+    accept(dE)
+        Return True if a move with energy change dE is accepted (also
+        available as __call__).
+    set_beta(beta)
+        Set a new value of beta, and clear the cache.
+    set_rng(rng)
+        Use rng from now on, discarding the uniform numbers already drawn.
+    uniform()
+        Return a uniform random number in [0, 1), from the current block.
+
+    Notes
+    -----
+    Any object with the set_beta(beta) and accept(dE) methods can be used
+    as the acceptance test of simulated_annealing, for problem classes
+    with the propose/accept/reject methods. Otherwise, a typical MC_move
+    reads
+
+        dE = ...  # energy change of the proposed move
+        if self.metropolis.accept(dE):
+            ...  # update the configuration
+            return 1
+        return 0
+
+    where self.metropolis.set_beta is called by the set_beta method of the
+    problem class.
+    '''
+
+    def __init__(self, beta=0.0, rng=None, discrete=False, block_size=1024):
+        if block_size < 1:
+            raise ValueError('block_size must be positive, not %r'
+                             % block_size)
+        self.discrete = discrete
+        self.block_size = block_size
+        self._block = []
+        self.set_rng(rng)
+        self.set_beta(beta)
+
+    def __repr__(self):
+        return 'Metropolis(beta=%r, discrete=%r, block_size=%r)' % (
+            self.beta, self.discrete, self.block_size)
+
+    def set_beta(self, beta):
+        self.beta = beta
+        self._probabilities = _ProbabilityCache(beta)
+
+    def set_rng(self, rng):
+        if rng is None:
+            try:
+                import numpy
+            except ImportError:
+                rng = random.Random()
+            else:
+                rng = numpy.random.default_rng()
+        self.rng = rng
+        del self._block[:]
+
+    def _fill_block(self):
+        # the block is consumed from the end, with list.pop()
+        if isinstance(self.rng, random.Random):
+            rand = self.rng.random
+            block = [rand() for ind in range(self.block_size)]
+        else:
+            block = self.rng.random(self.block_size).tolist()
+        block.reverse()
+        self._block[:] = block
+
+    def uniform(self):
+        try:
+            return self._block.pop()
+        except IndexError:
+            self._fill_block()
+            return self._block.pop()
+
+    def accept(self, dE):
+        if dE <= 0:
+            return True
+        try:
+            u = self._block.pop()
+        except IndexError:
+            self._fill_block()
+            u = self._block.pop()
+        if self.discrete:
+            return u < self._probabilities[dE]
+        return u < math.exp(- self.beta * dE)
+
+    __call__ = accept
+
+
+class _ProbabilityCache(dict):
+    '''
+    Mapping from dE to exp(-beta*dE), which stores the values computed
+    (and is cleared when it holds max_size values).
+    '''
+
+    max_size = 4096
+
+    def __init__(self, beta):
+        dict.__init__(self)
+        self.beta = beta
+
+    def __missing__(self, dE):
+        if len(self) >= self.max_size:
+            self.clear()
+        p = self[dE] = math.exp(- self.beta * dE)
+        return p
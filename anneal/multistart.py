@@ -0,0 +1,120 @@
+'''Multi-start annealing for anneal.
+
+This module contains multistart_annealing, which runs many independent
+simulated_annealing runs (one per problem instance) over a pool of worker
+processes.
+'''
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .anneal import simulated_annealing
+from .logs import _check_run_log, _run_log
+from .rng import _seeded_globals, _set_rng, _spawn_rngs_if_available
+
+__all__ = ['multistart_annealing']
+
+
+def _single_run(factory, ID, seed, rng, kwargs):
+    '''
+    Perform a single run of simulated_annealing on factory(), with the
+    global generators seeded with seed (and restored afterwards) and rng
+    passed to set_rng, and return its P, E and elapsed time. This is the
+    run shared by multistart_annealing, tune_annealing and run_config.
+    '''
+    with _seeded_globals(seed):
+        P = factory()
+        _set_rng(P, rng)
+        return simulated_annealing(P, ID, **kwargs)
+
+
+def _run_batch(factory, runs, kwargs, log):
+    '''
+    Perform a batch of runs, given as (ID, seed, rng) tuples, each with
+    its own log (see anneal.logs._run_log), and return
+    their final energies and elapsed times, and the final version of the
+    problem instance with the lowest energy (each worker performs whole
+    batches, and only sends back their best instance).
+    '''
+    energies = []
+    elapsed_times = []
+    P_best = None
+    for ID, seed, rng in runs:
+        P, E, elapsed_time = _single_run(factory, ID, seed, rng,
+                                         dict(kwargs, log=_run_log(log, ID)))
+        energies.append(P.energy)
+        elapsed_times.append(elapsed_time)
+        if P_best is None or P.energy < P_best.energy:
+            P_best = P
+    return energies, elapsed_times, P_best
+
+
+def multistart_annealing(factory, n_runs, ID='multistart', seed=0,
+                         n_workers=None, log='text', **kwargs):
+    '''
+    Perform several independent simulated-annealing runs, in parallel.
+
+    Parameters
+    ----------
+    factory : callable
+        Function (or class) with no arguments, which returns a new
+        instance of the problem class (see simulated_annealing). When
+        n_workers != 1, it must be picklable (e.g. a module-level function).
+    n_runs : int
+        Number of independent runs.
+    ID : str, optional
+        Label for the problem under study; run i is logged with label
+        <ID>_<i> (default: 'multistart')
+    seed : int, optional
+        Base seed. If the problem class has a set_rng method, run i gets
+        the i-th generator of anneal.rng.spawn_rngs(seed, n_runs);
+        otherwise, the global generators of run i are seeded with
+        seed + i. In both cases, results do not depend on the worker
+        executing each run (default: 0)
+    n_workers : int, optional
+        Number of worker processes; if None, use all available cores; if
+        1, perform all runs in the current process (default: None)
+    log : str or callable, optional
+        Log of each run: 'text' (a TextLog writing log_sim_ann_<label>.dat),
+        'npy' (a NpyLog with prefix log_sim_ann_<label>), 'none' (a
+        NullLog), or a callable which takes the label of a run and returns
+        its log (picklable, if n_workers != 1) (default: 'text')
+    **kwargs
+        Further keyword arguments, passed to simulated_annealing.
+
+    Returns
+    -------
+    P_best : object
+        Final version of the problem instance with the lowest energy
+    energies : list
+        List of the final energies for each run
+    elapsed_times : list
+        List of the elapsed times for each run, in seconds
+
+    '''
+    _check_run_log(log)
+    rngs = _spawn_rngs_if_available(seed, n_runs)
+    runs = [('%s_%i' % (ID, run), seed + run, rngs[run])
+            for run in range(n_runs)]
+    if n_workers == 1:
+        results = [_run_batch(factory, runs, kwargs, log)]
+    else:
+        # a few batches per worker, for load balancing
+        n_batches = min(n_runs, 4 * (n_workers or os.cpu_count() or 1))
+        batches = [runs[n_runs * ind // n_batches:
+                        n_runs * (ind + 1) // n_batches]
+                   for ind in range(n_batches)]
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(_run_batch, factory, batch, kwargs,
+                                       log)
+                       for batch in batches]
+            results = [future.result() for future in futures]
+    energies = []
+    elapsed_times = []
+    P_best = None
+    for batch_energies, batch_times, P in results:
+        energies.extend(batch_energies)
+        elapsed_times.extend(batch_times)
+        if P_best is None or P.energy < P_best.energy:
+            P_best = P
+    return P_best, energies, elapsed_times
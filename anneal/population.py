@@ -0,0 +1,366 @@
+'''Population annealing for anneal.
+
+This module contains population_annealing, which anneals a population of
+copies of the same problem: after each temperature step, copies are
+replicated or removed according to their Boltzmann weights at the new
+temperature, so that the population follows the equilibrium distribution
+while it is cooled. The population can be split across worker processes.
+'''
+
+import math
+import os
+import random
+import time
+
+from .anneal import _MC_moves
+from .logs import TextLog
+from .rng import (_global_state, _seed_global, _set_global_state, _set_rng,
+                  _spawn_rngs_if_available)
+from .schedules import GeometricSchedule
+from .tempering import _replica_moves
+from .trace import Trace
+from .workers import _WorkerPool
+
+__all__ = ['population_annealing']
+
+
+def _systematic_counts(weights, n, u):
+    '''
+    Return the number of copies of each item, for a systematic resampling
+    of n items with the given (non-negative) weights, with offset u in
+    [0, 1). Each count is the integer below or above n*w_i/sum(w), and
+    the counts sum up to n.
+    '''
+    total = float(sum(weights))
+    step = total / n
+    counts = [0] * len(weights)
+    ind = 0
+    cumulative = 0.0
+    for item, weight in enumerate(weights):
+        cumulative += weight
+        while ind < n and (u + ind) * step < cumulative:
+            counts[item] += 1
+            ind += 1
+    # points left over by round-off go to the last item with some weight
+    if ind < n:
+        last = max(item for item, weight in enumerate(weights) if weight > 0)
+        counts[last] += n - ind
+    return counts
+
+
+def _copy_plan(counts, chunk_of):
+    '''
+    Return the copies (destination, source) realizing the copy counts,
+    as two lists: copies within a chunk, and copies across chunks.
+
+    Each item with count n >= 1 keeps its state and is copied into n - 1
+    of the items with count 0; copies within the same chunk are
+    preferred, since they do not transfer states between processes.
+    '''
+    sources = {}
+    free = {}
+    for item, count in enumerate(counts):
+        if count == 0:
+            free.setdefault(chunk_of[item], []).append(item)
+        else:
+            sources.setdefault(chunk_of[item], []).extend(
+                [item] * (count - 1))
+    local = []
+    for chunk in sorted(sources):
+        dst = free.get(chunk, [])
+        src = sources[chunk]
+        n_local = min(len(dst), len(src))
+        local.extend(zip(dst[:n_local], src[:n_local]))
+        del dst[:n_local], src[:n_local]
+    dst = [item for chunk in sorted(free) for item in free[chunk]]
+    src = [item for chunk in sorted(sources) for item in sources[chunk]]
+    return local, list(zip(dst, src))
+
+
+class _Chunk(object):
+    '''
+    A contiguous part of the population.
+    '''
+
+    def __init__(self, factory, rngs):
+        self.replicas = []
+        self.moves = []
+        for rng in rngs:
+            P = factory()
+            if not (hasattr(P, 'snapshot') and hasattr(P, 'restore')):
+                raise TypeError('population_annealing requires the '
+                                'snapshot/restore methods.')
+            _set_rng(P, rng)
+            self.replicas.append(P)
+            self.moves.append(_replica_moves(P, rng))
+
+    def sweep(self, beta, n_steps):
+        '''
+        Perform n_steps MC moves per replica at inverse temperature beta,
+        and return the energies and numbers of accepted moves.
+        '''
+        energies = []
+        accs = []
+        for P, moves in zip(self.replicas, self.moves):
+            P.set_beta(beta)
+            acc = _MC_moves(moves, n_steps)
+            P.update_MC_parameters(acc / float(n_steps))
+            energies.append(P.energy)
+            accs.append(acc)
+        return energies, accs
+
+    def export(self, items):
+        return [self.replicas[item].snapshot() for item in items]
+
+    def resample(self, copies, imports):
+        '''
+        Perform the copies (destination, source) within the chunk, and
+        restore the imported states (destination, state).
+        '''
+        replicas = self.replicas
+        for dst, src in copies:
+            replicas[dst].restore(replicas[src].snapshot())
+        for dst, state in imports:
+            replicas[dst].restore(state)
+
+    def get(self, item):
+        return self.replicas[item]
+
+
+def _worker_chunk(factory, seed, rngs):
+    '''
+    Build a chunk in a worker process.
+    '''
+    _seed_global(seed)
+    return _Chunk(factory, rngs)
+
+
+class _LocalChunks(object):
+    '''
+    Chunks living in the current process; the global random-number
+    generators are seeded until close() restores their previous state.
+    '''
+
+    def __init__(self, factory, seed, rngs_per_chunk):
+        self._global_state = _global_state()
+        _seed_global(seed)
+        try:
+            self.chunks = [_Chunk(factory, rngs) for rngs in rngs_per_chunk]
+        except BaseException:
+            self.close()
+            raise
+
+    def call(self, calls):
+        return [getattr(self.chunks[chunk], method)(*args)
+                for chunk, method, args in calls]
+
+    def close(self):
+        _set_global_state(self._global_state)
+
+
+class _ProcessChunks(_WorkerPool):
+    '''
+    Chunks living in worker processes (one process per chunk).
+    '''
+
+    def __init__(self, factory, seed, rngs_per_chunk):
+        _WorkerPool.__init__(self, _worker_chunk,
+                             [(factory, seed + ind, rngs)
+                              for ind, rngs in enumerate(rngs_per_chunk)])
+
+
+def population_annealing(factory, ID, n_replicas=100, beta_min=1e-2,
+                         beta_max=1e2, cooling_rate=1e-2, n_steps_per_T=100,
+                         E_min=-float('inf'), schedule=None, seed=None,
+                         n_workers=1, log=None):
+    '''
+    Population-annealing optimization function.
+
+    Parameters
+    ----------
+    factory : callable
+        Function (or class) with no arguments, which returns a new
+        instance of the problem class, with the same requirements as for
+        simulated_annealing, and with the snapshot() and restore(state)
+        methods, used to copy configurations between instances. When
+        n_workers != 1, it must be picklable (e.g. a module-level
+        function), and so must snapshots.
+    ID : str
+        Label for the problem under study.
+    n_replicas : int, optional
+        Population size, kept fixed during the run (default: 100)
+    beta_min, beta_max, cooling_rate, n_steps_per_T, E_min : optional
+        As for simulated_annealing; n_steps_per_T MC moves are attempted
+        by each replica at each temperature, and the annealing stops when
+        any replica reaches E_min.
+    schedule : object, optional
+        Cooling schedule, see anneal.schedules; mean and variance of the
+        energy are computed over the population (default: a
+        GeometricSchedule with the given cooling_rate)
+    seed : int, optional
+        Seed for the random-number generators. If the problem class has a
+        set_rng method, replica i gets the i-th generator of
+        anneal.rng.spawn_rngs(seed, n_replicas + 1), and the resampling
+        uses the last one; otherwise, the global generators are seeded
+        with seed + k, in the process of the k-th part of the population.
+        Results are reproducible for given seed and n_workers (default:
+        None, random seed)
+    n_workers : int, optional
+        If 1, the whole population lives in the current process;
+        otherwise, it is split into n_workers parts of (almost) equal
+        size, each living in its own worker process; if None, use all
+        available cores (default: 1)
+    log : object, optional
+        Log sink, see anneal.logs; lowest energy and mean acceptance
+        ratio are logged (default: a TextLog writing to
+        log_pop_ann_<ID>.dat)
+
+    Returns
+    -------
+    P : object
+        Replica with the lowest energy (restored to the lowest-energy
+        configuration found during the run)
+    E : Trace
+        Values of beta, lowest energy, mean acceptance ratio, elapsed
+        time, number of MC moves per replica and process CPU time at the
+        end of each temperature step
+    elapsed_time : float
+        Total elapsed time, in seconds
+
+    Notes
+    -----
+    After the MC moves at inverse temperature beta, the schedule gives
+    the next value beta', and each replica i is given the weight
+    exp(-(beta'-beta)*E_i). The new population is drawn from the old one
+    with these weights (by systematic resampling, so that replica i gets
+    either the integer below or above n_replicas times its normalized
+    weight, as copies), and copies are made with snapshot/restore. Copies
+    within the same part of the population are preferred, and only the
+    states copied between different parts are transferred between
+    processes (hence the dependence of the results on n_workers).
+    '''
+    # initialize
+    time_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+    if schedule is None:
+        schedule = GeometricSchedule(cooling_rate)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_chunks = max(1, min(n_workers, n_replicas))
+    bounds = [n_replicas * ind // n_chunks for ind in range(n_chunks + 1)]
+    chunk_of = []
+    for chunk in range(n_chunks):
+        chunk_of.extend([chunk] * (bounds[chunk + 1] - bounds[chunk]))
+    rngs = _spawn_rngs_if_available(seed, n_replicas + 1)
+    if rngs[-1] is not None:
+        uniform = rngs[-1].random
+    else:
+        uniform = random.Random(seed).random
+    rngs_per_chunk = [rngs[bounds[chunk]:bounds[chunk + 1]]
+                      for chunk in range(n_chunks)]
+    if log is None:
+        log = TextLog('log_pop_ann_%s.dat' % ID)
+    log.comment('start - %s' % time.strftime('%c'))
+    log.comment('replicas: %i' % n_replicas)
+    log.comment('workers: %i' % n_workers)
+    log.comment('beta_min: %f' % beta_min)
+    log.comment('beta_max: %f' % beta_max)
+    log.comment('schedule: %r' % schedule)
+    log.comment('n_steps_per_T %f' % n_steps_per_T)
+    log.comment('')
+    if n_chunks == 1:
+        pool = _LocalChunks(factory, seed, rngs_per_chunk)
+    else:
+        pool = _ProcessChunks(factory, seed, rngs_per_chunk)
+
+    def local_index(item):
+        return item - bounds[chunk_of[item]]
+
+    E = Trace()
+    E_best = float('inf')
+    best_state = None
+    beta = beta_min
+    beta_old = beta_min
+    energies = None
+    try:
+        # annealing loop
+        while beta < beta_max:
+            if energies is not None:
+                # resample the population, with weights exp(-dbeta*dE)
+                d_beta = beta - beta_old
+                E_ref = min(energies)
+                weights = [1.0 if energy == E_ref else
+                           math.exp(- d_beta * (energy - E_ref))
+                           for energy in energies]
+                counts = _systematic_counts(weights, n_replicas, uniform())
+                local, remote = _copy_plan(counts, chunk_of)
+                copies = [[] for chunk in range(n_chunks)]
+                for dst, src in local:
+                    copies[chunk_of[dst]].append((local_index(dst),
+                                                  local_index(src)))
+                exports = {}
+                for dst, src in remote:
+                    exports.setdefault(chunk_of[src], []).append(src)
+                states = {}
+                if exports:
+                    exported = pool.call([(chunk, 'export',
+                                           ([local_index(src)
+                                             for src in exports[chunk]],))
+                                          for chunk in sorted(exports)])
+                    for chunk, chunk_states in zip(sorted(exports),
+                                                   exported):
+                        states.update(zip(exports[chunk], chunk_states))
+                imports = [[] for chunk in range(n_chunks)]
+                for dst, src in remote:
+                    imports[chunk_of[dst]].append((local_index(dst),
+                                                   states[src]))
+                pool.call([(chunk, 'resample',
+                            (copies[chunk], imports[chunk]))
+                           for chunk in range(n_chunks)
+                           if copies[chunk] or imports[chunk]])
+            # MC moves
+            results = pool.call([(chunk, 'sweep', (beta, n_steps_per_T))
+                                 for chunk in range(n_chunks)])
+            energies = [energy for chunk_energies, accs in results
+                        for energy in chunk_energies]
+            acc = sum(sum(accs) for chunk_energies, accs in results)
+            acc_ratio = acc / float(n_steps_per_T * n_replicas)
+            E_lowest = min(energies)
+            log.record(beta, E_lowest, acc_ratio)
+            E.append(beta, E_lowest, acc_ratio,
+                     time.perf_counter() - time_start, n_steps_per_T,
+                     time.process_time() - cpu_start)
+            if E_lowest < E_best:
+                E_best = E_lowest
+                best = energies.index(E_lowest)
+                best_state = pool.call([(chunk_of[best], 'export',
+                                         ([local_index(best)],))])[0][0]
+            if E_lowest <= E_min:
+                log.comment('reached E_min=%s. Break.' % E_min)
+                break
+            # update beta
+            E_mean = sum(energies) / float(n_replicas)
+            E_var = max(sum(energy ** 2 for energy in energies) /
+                        float(n_replicas) - E_mean ** 2, 0.0)
+            beta_old = beta
+            beta = schedule.next_beta(beta, acc_ratio, E_mean, E_var)
+        if energies is None:
+            P = pool.call([(0, 'get', (0,))])[0]
+        else:
+            item = energies.index(min(energies))
+            P = pool.call([(chunk_of[item], 'get',
+                            (local_index(item),))])[0]
+    finally:
+        pool.close()
+    # go back to the lowest-energy configuration
+    if best_state is not None and E_best < P.energy:
+        P.restore(best_state)
+        log.comment('restored lowest-energy configuration, E=%g' % P.energy)
+    # finalize
+    log.comment('end')
+    elapsed_time = time.perf_counter() - time_start
+    log.comment('elapsed: %.2f s' % elapsed_time)
+    log.close()
+    return P, E, elapsed_time
@@ -0,0 +1,120 @@
+'''Random-number generators for anneal.
+
+This module contains the functions used to give each run (or replica) its
+own, independent random-number generator. Problem classes which draw
+their random numbers from a generator of their own expose the method
+
+    + set_rng(rng): use the numpy.random.Generator rng from now on
+
+and the engines then call it with a generator derived from the run seed
+(via numpy.random.SeedSequence.spawn), so that parallel runs are
+reproducible and share no global state. Classes which also keep the
+generator as P.rng have the random streams of the engine (e.g. the
+Metropolis test of propose/accept/reject problems) seeded from it, when
+simulated_annealing is not given a generator of its own.
+'''
+
+import contextlib
+import random
+
+__all__ = ['spawn_rngs', 'seeded_random']
+
+
+def spawn_rngs(seed, n, start=0):
+    '''
+    Return a list of n independent numpy.random.Generator instances,
+    derived from seed via numpy.random.SeedSequence.spawn.
+
+    With start > 0, return the generators start, ..., start + n - 1 of the
+    same sequence (e.g. to add runs to an existing batch).
+    '''
+    import numpy
+    # same as numpy.random.SeedSequence(seed).spawn(start + n)[start:]
+    seed_sequences = [numpy.random.SeedSequence(seed, spawn_key=(ind,))
+                      for ind in range(start, start + n)]
+    return [numpy.random.default_rng(seq) for seq in seed_sequences]
+
+
+def seeded_random(rng=None):
+    '''
+    Return a random.Random seeded by the numpy.random.Generator rng (or,
+    if rng is None, by the global random module).
+
+    Drawing single numbers from it is much faster than calling the
+    methods of rng for each of them, which makes it the generator of
+    choice for the MC moves of set_rng classes.
+    '''
+    if rng is not None:
+        seed = int(rng.integers(2 ** 63))
+    else:
+        seed = random.getrandbits(63)
+    return random.Random(seed)
+
+
+def _spawn_rngs_if_available(seed, n, start=0):
+    '''
+    As spawn_rngs, but return a list of None if numpy is not available.
+    '''
+    try:
+        return spawn_rngs(seed, n, start)
+    except ImportError:
+        return [None] * n
+
+
+def _set_rng(P, rng):
+    '''
+    Pass rng to P, if P supports it.
+    '''
+    if rng is not None and hasattr(P, 'set_rng'):
+        P.set_rng(rng)
+
+
+def _seed_global(seed):
+    '''
+    Seed the global random-number generators (used by problem classes
+    without set_rng).
+    '''
+    random.seed(seed)
+    try:
+        import numpy
+    except ImportError:
+        return
+    numpy.random.seed(seed % 2 ** 32)
+
+
+def _global_state():
+    '''
+    Return the state of the global random-number generators.
+    '''
+    try:
+        import numpy
+    except ImportError:
+        return random.getstate(), None
+    return random.getstate(), numpy.random.get_state()
+
+
+def _set_global_state(state):
+    '''
+    Set the global random-number generators back to a state returned by
+    _global_state.
+    '''
+    random_state, numpy_state = state
+    random.setstate(random_state)
+    if numpy_state is not None:
+        import numpy
+        numpy.random.set_state(numpy_state)
+
+
+@contextlib.contextmanager
+def _seeded_globals(seed):
+    '''
+    Seed the global random-number generators within a with block, and
+    restore their previous state at its end, so that runs performed in
+    the caller's process leave its generators untouched.
+    '''
+    state = _global_state()
+    _seed_global(seed)
+    try:
+        yield
+    finally:
+        _set_global_state(state)
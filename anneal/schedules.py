@@ -0,0 +1,164 @@
+'''Cooling schedules for anneal.
+
+This module contains the cooling schedules which can be used by
+simulated_annealing. A schedule is an object with the method
+
+    + next_beta(beta, acc_ratio, E_mean, E_var): return the inverse
+      temperature following beta
+
+and the attribute needs_energy_stats. When the latter is True, E_mean and
+E_var are the mean and variance of the energy over the MC moves at the
+current temperature (otherwise they are None, and P.MC_sweep can be used).
+Schedules are stateless, so that they can be stored in checkpoints.
+'''
+
+import bisect
+import math
+
+__all__ = ['GeometricSchedule', 'LinearSchedule', 'LogarithmicSchedule',
+           'ArraySchedule', 'VarianceSchedule', 'LamSchedule']
+
+
+class GeometricSchedule(object):
+    '''
+    Geometric schedule, beta -> beta * (1 + cooling_rate).
+    '''
+
+    needs_energy_stats = False
+
+    def __init__(self, cooling_rate=1e-2):
+        self.cooling_rate = cooling_rate
+
+    def next_beta(self, beta, acc_ratio, E_mean, E_var):
+        return beta * (1.0 + self.cooling_rate)
+
+    def __repr__(self):
+        return 'GeometricSchedule(cooling_rate=%g)' % self.cooling_rate
+
+
+class LinearSchedule(object):
+    '''
+    Linear schedule, beta -> beta + d_beta.
+    '''
+
+    needs_energy_stats = False
+
+    def __init__(self, d_beta):
+        self.d_beta = d_beta
+
+    def next_beta(self, beta, acc_ratio, E_mean, E_var):
+        return beta + self.d_beta
+
+    def __repr__(self):
+        return 'LinearSchedule(d_beta=%g)' % self.d_beta
+
+
+class LogarithmicSchedule(object):
+    '''
+    Logarithmic schedule, where the k-th inverse temperature is
+    c * log(k + k0), for some k0 fixed by the initial value of beta.
+
+    Given beta = c * log(k + k0), the following inverse temperature is
+    c * log(k + k0 + 1) = c * log(exp(beta / c) + 1).
+    '''
+
+    needs_energy_stats = False
+
+    def __init__(self, c):
+        self.c = c
+
+    def next_beta(self, beta, acc_ratio, E_mean, E_var):
+        return beta + self.c * math.log1p(math.exp(- beta / self.c))
+
+    def __repr__(self):
+        return 'LogarithmicSchedule(c=%g)' % self.c
+
+
+class ArraySchedule(object):
+    '''
+    Explicit schedule, given as an increasing sequence of inverse
+    temperatures. After the last one, next_beta returns infinity (which
+    ends the annealing loop).
+    '''
+
+    needs_energy_stats = False
+
+    def __init__(self, betas):
+        self.betas = sorted(betas)
+
+    def next_beta(self, beta, acc_ratio, E_mean, E_var):
+        ind = bisect.bisect_right(self.betas, beta)
+        if ind == len(self.betas):
+            return float('inf')
+        return self.betas[ind]
+
+    def __repr__(self):
+        return 'ArraySchedule(%i betas)' % len(self.betas)
+
+
+class _AdaptiveSchedule(object):
+    '''
+    Base class for adaptive schedules, whose relative change of beta is
+    kept within [rate_min, rate_max].
+    '''
+
+    needs_energy_stats = True
+
+    def __init__(self, rate_min, rate_max):
+        self.rate_min = rate_min
+        self.rate_max = rate_max
+
+    def _clip(self, beta, d_beta):
+        d_beta = min(max(d_beta, beta * self.rate_min), beta * self.rate_max)
+        return beta + d_beta
+
+
+class VarianceSchedule(_AdaptiveSchedule):
+    '''
+    Adaptive schedule with beta -> beta + lam / sigma, where sigma is the
+    standard deviation of the energy at the current temperature.
+
+    Large energy fluctuations (i.e. a large specific heat) make beta
+    change slowly, so that more MC moves are spent where the energy is
+    changing.
+    '''
+
+    def __init__(self, lam=1e-1, rate_min=1e-4, rate_max=1e-1):
+        _AdaptiveSchedule.__init__(self, rate_min, rate_max)
+        self.lam = lam
+
+    def next_beta(self, beta, acc_ratio, E_mean, E_var):
+        if E_var <= 0.0:
+            return self._clip(beta, float('inf'))
+        return self._clip(beta, self.lam / math.sqrt(E_var))
+
+    def __repr__(self):
+        return 'VarianceSchedule(lam=%g, rate_min=%g, rate_max=%g)' % (
+            self.lam, self.rate_min, self.rate_max)
+
+
+class LamSchedule(_AdaptiveSchedule):
+    '''
+    Adaptive schedule of Lam and Delosme, with
+
+        beta -> beta + lam / (beta^2 * sigma^3) * G(acc_ratio),
+
+    where sigma is the standard deviation of the energy at the current
+    temperature, and G(rho) = 4 rho (1 - rho)^2 / (2 - rho)^2 is largest
+    for an acceptance ratio rho close to 0.44.
+    '''
+
+    def __init__(self, lam=1e-1, rate_min=1e-4, rate_max=1e-1):
+        _AdaptiveSchedule.__init__(self, rate_min, rate_max)
+        self.lam = lam
+
+    def next_beta(self, beta, acc_ratio, E_mean, E_var):
+        if E_var <= 0.0:
+            return self._clip(beta, float('inf'))
+        rho = acc_ratio
+        G = 4.0 * rho * (1.0 - rho) ** 2 / (2.0 - rho) ** 2
+        return self._clip(beta, self.lam * G / (beta ** 2 * E_var ** 1.5))
+
+    def __repr__(self):
+        return 'LamSchedule(lam=%g, rate_min=%g, rate_max=%g)' % (
+            self.lam, self.rate_min, self.rate_max)
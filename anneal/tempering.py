@@ -0,0 +1,228 @@
+'''Parallel tempering for anneal.
+
+This module contains parallel_tempering, which runs several replicas of
+the same problem at a fixed ladder of inverse temperatures and proposes
+swaps between neighboring temperatures.
+'''
+
+import math
+import os
+import random
+import time
+
+from .anneal import _MC_moves, _default_acceptance, _has_propose, _moves
+from .rng import (_global_state, _seed_global, _set_global_state, _set_rng,
+                  _spawn_rngs_if_available)
+from .workers import _WorkerPool
+
+__all__ = ['parallel_tempering']
+
+
+def _replica_moves(P, rng):
+    '''
+    Return the object performing the MC moves of replica P (see
+    anneal.anneal._moves).
+    '''
+    if _has_propose(P):
+        return _moves(P, _default_acceptance(P, rng))
+    return P
+
+
+def _sweep(P, moves, beta, n_steps):
+    '''
+    Perform n_steps MC moves at inverse temperature beta.
+    '''
+    P.set_beta(beta)
+    acc = _MC_moves(moves, n_steps)
+    acc_ratio = acc / float(n_steps)
+    P.update_MC_parameters(acc_ratio)
+    return P.energy
+
+
+class _ReplicaGroup(object):
+    '''
+    A contiguous group of replicas.
+    '''
+
+    def __init__(self, replicas, rngs):
+        for P, rng in zip(replicas, rngs):
+            _set_rng(P, rng)
+        self.replicas = replicas
+        self.moves = [_replica_moves(P, rng) for P, rng in zip(replicas, rngs)]
+
+    def sweep(self, betas, n_steps):
+        return [_sweep(P, moves, beta, n_steps)
+                for P, moves, beta in zip(self.replicas, self.moves, betas)]
+
+    def get(self):
+        return self.replicas
+
+
+def _worker_group(replicas, seed, rngs):
+    '''
+    Build a group of replicas in a worker process.
+    '''
+    _seed_global(seed)
+    return _ReplicaGroup(replicas, rngs)
+
+
+class _ProcessReplicas(object):
+    '''
+    Replicas living in n_workers worker processes, each one holding a
+    contiguous group of replicas.
+    '''
+
+    def __init__(self, replicas, seed, rngs, n_workers):
+        n_groups = min(n_workers, len(replicas))
+        self.bounds = [len(replicas) * ind // n_groups
+                       for ind in range(n_groups + 1)]
+        self.n_groups = n_groups
+        self.pool = _WorkerPool(
+            _worker_group,
+            [(replicas[first:last], seed + ind, rngs[first:last])
+             for ind, (first, last) in enumerate(zip(self.bounds[:-1],
+                                                     self.bounds[1:]))])
+
+    def sweep(self, betas, n_steps):
+        results = self.pool.call(
+            [(ind, 'sweep',
+              (betas[self.bounds[ind]:self.bounds[ind + 1]], n_steps))
+             for ind in range(self.n_groups)])
+        return [energy for energies in results for energy in energies]
+
+    def get(self):
+        results = self.pool.call([(ind, 'get', ())
+                                  for ind in range(self.n_groups)])
+        return [P for replicas in results for P in replicas]
+
+    def close(self):
+        self.pool.close()
+
+
+class _LocalReplicas(_ReplicaGroup):
+    '''
+    Replicas living in the current process; the global random-number
+    generators are seeded until close() restores their previous state.
+    '''
+
+    def __init__(self, replicas, seed, rngs):
+        self._global_state = _global_state()
+        _seed_global(seed)
+        _ReplicaGroup.__init__(self, replicas, rngs)
+
+    def close(self):
+        _set_global_state(self._global_state)
+
+
+def parallel_tempering(replicas, ID, betas, n_steps_per_swap=100,
+                       n_swaps=1000, E_min=-float('inf'), seed=None,
+                       n_workers=1):
+    '''
+    Replica-exchange (parallel-tempering) optimization function.
+
+    Parameters
+    ----------
+    replicas : list
+        List of instances of the same custom class, with the same
+        requirements as for simulated_annealing.
+    ID : str
+        Label for the problem under study.
+    betas : list
+        Ladder of inverse temperatures, one per replica, in increasing
+        order.
+    n_steps_per_swap : int, optional
+        Number of MC moves attempted by each replica between two rounds
+        of swap proposals (default: 100)
+    n_swaps : int, optional
+        Number of rounds of swap proposals (default: 1000)
+    E_min : float, optional
+        Global energy minimum, if known (default: -infinity)
+    seed : int, optional
+        Seed for the random-number generators. If the problem class has a
+        set_rng method, replica i gets the i-th generator of
+        anneal.rng.spawn_rngs(seed, len(replicas) + 1), and the swaps use
+        the last one, so that results do not depend on n_workers;
+        otherwise, the global generators are seeded with seed (or with
+        seed + k, in the k-th worker process) (default: None, random
+        seed)
+    n_workers : int, optional
+        Number of processes: if 1, all replicas live in the current
+        process; otherwise, they are split into n_workers groups of
+        (almost) equal size, each one living in its own worker process;
+        if None, use all available cores (default: 1)
+
+    Returns
+    -------
+    P : object
+        Final version of the replica with the lowest energy
+    E : list
+        List of the lowest replica energies after each round
+    elapsed_time : float
+        Total elapsed time, in seconds
+
+    '''
+    if len(replicas) != len(betas):
+        raise ValueError('Got %i replicas and %i betas.' %
+                         (len(replicas), len(betas)))
+    # initialize
+    time_start = time.perf_counter()
+    if seed is None:
+        seed = random.randrange(2 ** 31)
+    n_replicas = len(replicas)
+    # betas[ind_beta] is assigned to replica rep_at[ind_beta]
+    rep_at = list(range(n_replicas))
+    E = []
+    acc_swaps = [0] * (n_replicas - 1)
+    n_proposed = [0] * (n_replicas - 1)
+    rngs = _spawn_rngs_if_available(seed, n_replicas + 1)
+    if rngs[-1] is not None:
+        uniform = rngs[-1].random
+    else:
+        uniform = random.random
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    if n_workers == 1:
+        pool = _LocalReplicas(replicas, seed, rngs)
+    else:
+        pool = _ProcessReplicas(replicas, seed, rngs, n_workers)
+    out = open('log_par_temp_%s.dat' % ID, 'w')
+    out.write('# start - %s\n' % time.strftime('%c'))
+    out.write('# betas: %s\n' % ' '.join('%g' % beta for beta in betas))
+    out.write('# n_steps_per_swap: %i\n' % n_steps_per_swap)
+    out.write('# n_swaps: %i\n' % n_swaps)
+    out.write('#\n')
+    # replica-exchange loop
+    try:
+        for n_swap in range(n_swaps):
+            replica_betas = [None] * n_replicas
+            for ind_beta, rep in enumerate(rep_at):
+                replica_betas[rep] = betas[ind_beta]
+            energies = pool.sweep(replica_betas, n_steps_per_swap)
+            # propose swaps between neighboring betas (even/odd pairs)
+            for ind_beta in range(n_swap % 2, n_replicas - 1, 2):
+                rep1, rep2 = rep_at[ind_beta], rep_at[ind_beta + 1]
+                n_proposed[ind_beta] += 1
+                delta = ((betas[ind_beta + 1] - betas[ind_beta]) *
+                         (energies[rep1] - energies[rep2]))
+                if delta < 0.0 or uniform() < math.exp(- delta):
+                    rep_at[ind_beta], rep_at[ind_beta + 1] = rep2, rep1
+                    acc_swaps[ind_beta] += 1
+            E.append(min(energies))
+            out.write('%10.4g  %10.4g\n' % (E[-1], energies[rep_at[-1]]))
+            if E[-1] <= E_min:
+                out.write('# reached E_min=%s. Break.\n' % E_min)
+                break
+        final_replicas = pool.get()
+    finally:
+        pool.close()
+    # finalize
+    out.write('# swap acceptance: %s\n' %
+              ' '.join('%.4f' % (acc / float(max(n_prop, 1)))
+                       for acc, n_prop in zip(acc_swaps, n_proposed)))
+    out.write('# end\n')
+    elapsed_time = time.perf_counter() - time_start
+    out.write('# elapsed: %.2f s\n' % elapsed_time)
+    out.close()
+    final_energies = [P.energy for P in final_replicas]
+    P = final_replicas[final_energies.index(min(final_energies))]
+    return P, E, elapsed_time
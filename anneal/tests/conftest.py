@@ -0,0 +1,15 @@
+'''
+created: 2026-10-18
+'''
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _run_in_tmp_path(tmp_path, monkeypatch):
+    '''
+    Run each test in its own temporary directory, so that the files
+    written by default (e.g. the log_sim_ann_<ID>.dat of a run) do not
+    end up in the current directory.
+    '''
+    monkeypatch.chdir(tmp_path)
@@ -0,0 +1,117 @@
+'''
+created: 2026-10-18
+'''
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from builtins import object
+from anneal import AsyncAnnealer, NullLog, simulated_annealing
+from anneal.tests.test_multistart import random_problem_class
+
+
+class counting_problem_class(object):
+
+    def __init__(self):
+        self.energy = 0.0
+        self.beta = 0.0
+        self.n_moves = 0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        self.n_moves += 1
+        self.energy = - self.n_moves
+        return 1
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+KWARGS = dict(beta_min=1.0, beta_max=2.0, cooling_rate=0.1,
+              n_steps_per_T=10, log=NullLog())
+
+
+class test_aio(object):
+
+    def test_run_with_threads(self):
+        P_ref, E_ref, time = simulated_annealing(counting_problem_class(),
+                                                 'ID', **KWARGS)
+
+        async def main():
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                async with AsyncAnnealer(executor,
+                                         max_concurrency=2) as annealer:
+                    return await asyncio.gather(*[
+                        annealer.run(counting_problem_class(), 'ID',
+                                     **KWARGS)
+                        for ind in range(5)])
+
+        for P, E, time in asyncio.run(main()):
+            assert list(E) == list(E_ref)
+            assert P.n_moves == P_ref.n_moves
+
+    def test_progress_and_cancellation(self):
+        # without cancellation, this run would never end
+        kwargs = dict(KWARGS, beta_max=float('inf'))
+
+        async def main():
+            with ThreadPoolExecutor(1) as executor:
+                async with AsyncAnnealer(executor) as annealer:
+                    job = await annealer.start(counting_problem_class(),
+                                               'ID', **kwargs)
+                    records = []
+                    async for record in job:
+                        records.append(record)
+                        if len(records) == 3:
+                            job.cancel()
+                    P, E, time = await job.result()
+            return records, P, E
+
+        records, P, E = asyncio.run(main())
+        # the run may get more than max_records records ahead of the loop,
+        # in which case the oldest ones are dropped: the records read are
+        # then in order, and end with the last one
+        energies = [rec.energy for rec in records]
+        assert len(energies) >= 3
+        assert set(energies) <= set(E)
+        assert energies == sorted(energies, reverse=True)
+        assert energies[-1] == E[-1]
+
+    def test_run_with_processes(self):
+
+        async def main():
+            async with AsyncAnnealer(max_concurrency=2) as annealer:
+                job = await annealer.start(random_problem_class(), 'ID',
+                                           **KWARGS)
+                records = [record async for record in job]
+                P, E, time = await job.result()
+            return records, P, E
+
+        records, P, E = asyncio.run(main())
+        assert [rec.energy for rec in records] == list(E)
+        assert P.energy == E[-1]
+
+    def test_max_records(self):
+
+        async def main():
+            with ThreadPoolExecutor(1) as executor:
+                async with AsyncAnnealer(executor,
+                                         max_records=2) as annealer:
+                    job = await annealer.start(counting_problem_class(),
+                                               'ID', **KWARGS)
+                    P, E, time = await job.result()
+                    records = [record async for record in job]
+            return records, E
+
+        # the records were not read during the run: only the last two are
+        # kept
+        records, E = asyncio.run(main())
+        assert len(E) > 2
+        assert [rec.energy for rec in records] == list(E)[-2:]
+        try:
+            AsyncAnnealer(max_records=0)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
@@ -4,7 +4,8 @@ author: tc
 '''
 
 from builtins import object
-from anneal import simulated_annealing
+from anneal import (simulated_annealing, iter_simulated_annealing, Instruments,
+                    Metropolis, NullLog, VarianceSchedule)
 
 
 class test_simulated_annealing(object):
@@ -53,3 +54,430 @@ class test_simulated_annealing(object):
         P, E, time = simulated_annealing(P, ID, beta_min=1.0, beta_max=2.0,
                                          cooling_rate=0.1, n_steps_per_T=10,
                                          quench_to_T0=True, n_steps_T0=10)
+
+    def test_sim_ann_with_MC_sweep(self):
+
+        class sweep_problem_class(object):
+
+            def __init__(self):
+                self.energy = 0.0
+                self.beta = 0.0
+                self.n_sweeps = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                raise NotImplementedError
+
+            def MC_sweep(self, n_steps):
+                self.n_sweeps += 1
+                return n_steps
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        P = sweep_problem_class()
+        ID = 'ID'
+        P, E, time = simulated_annealing(P, ID, beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=NullLog())
+        assert P.n_sweeps == len(E)
+
+    def test_sim_ann_restores_best_state(self):
+
+        class snapshot_problem_class(object):
+
+            def __init__(self):
+                self.energies = [3.0, 1.0, 2.0, 5.0, 4.0] * 10
+                self.energy = 10.0
+                self.beta = 0.0
+                self.n_snapshots = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                self.energy = self.energies.pop(0)
+                return 1
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+            def snapshot(self):
+                self.n_snapshots += 1
+                return self.energy
+
+            def restore(self, state):
+                self.energy = state
+
+        P = snapshot_problem_class()
+        ID = 'ID'
+        P, E, time = simulated_annealing(P, ID, beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=1,
+                                         log=NullLog())
+        assert E[-1] == 2.0
+        assert P.energy == 1.0
+        assert P.n_snapshots == 2
+
+    def test_sim_ann_tracks_best_state_within_steps(self):
+
+        class dip_problem_class(object):
+            '''Energy 5, except after the second of every four moves.'''
+
+            def __init__(self):
+                self.energy = 5
+                self.beta = 0.0
+                self.n_moves = 0
+                self.n_snapshots = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def _next_energy(self):
+                return 1 if (self.n_moves + 1) % 4 == 2 else 5
+
+            def MC_move(self):
+                self.energy = self._next_energy()
+                self.n_moves += 1
+                return 1
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+            def snapshot(self):
+                self.n_snapshots += 1
+                return self.energy
+
+            def restore(self, state):
+                self.energy = state
+
+        class dip_propose_class(dip_problem_class):
+
+            def propose(self):
+                return self._next_energy() - self.energy
+
+            def accept(self):
+                self.MC_move()
+
+            def reject(self):
+                pass
+
+        class accept_all(object):
+
+            def set_beta(self, beta):
+                pass
+
+            def accept(self, dE):
+                return True
+
+        kwargs = dict(beta_min=1.0, beta_max=2.0, cooling_rate=0.1,
+                      n_steps_per_T=4, log=NullLog())
+        runs = [(dip_problem_class(), {}),
+                (dip_problem_class(), {'schedule': VarianceSchedule()}),
+                (dip_propose_class(), {'acceptance': accept_all()})]
+        for P, run_kwargs in runs:
+            P, E, time = simulated_annealing(P, 'ID', **dict(kwargs,
+                                                             **run_kwargs))
+            assert min(E) == 5
+            assert P.energy == 1
+            assert P.n_snapshots == 2
+
+    def test_sim_ann_with_instruments(self):
+
+        class half_accepted_problem_class(object):
+
+            def __init__(self):
+                self.energy = 0.0
+                self.beta = 0.0
+                self.n_moves = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                self.n_moves += 1
+                return self.n_moves % 2
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        records = []
+        instruments = Instruments(
+            callbacks=[lambda P, rec: records.append(rec)])
+        P = half_accepted_problem_class()
+        ID = 'ID'
+        P, E, time = simulated_annealing(P, ID, beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         quench_to_T0=True, n_steps_T0=10,
+                                         instruments=instruments,
+                                         log=NullLog())
+        assert instruments.n_proposed == P.n_moves
+        assert instruments.n_accepted == P.n_moves // 2
+        assert instruments.n_rejected == P.n_moves // 2
+        assert len(records) == len(E) - 1
+        assert [rec.acc_ratio for rec in records] == [0.5] * len(records)
+        assert instruments.timers['MC_moves'] > 0.0
+
+    def test_iter_sim_ann(self):
+
+        class countdown_problem_class(object):
+
+            def __init__(self):
+                self.energy = 100.0
+                self.beta = 0.0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                self.energy -= 1.0
+                return 1
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+            def snapshot(self):
+                return self.energy
+
+            def restore(self, state):
+                self.energy = state
+
+        kwargs = dict(beta_min=1.0, beta_max=2.0, cooling_rate=0.1,
+                      n_steps_per_T=2, quench_to_T0=True, n_steps_T0=3,
+                      log=NullLog())
+        P_ref, E_ref, time = simulated_annealing(countdown_problem_class(),
+                                                 'ID', **kwargs)
+        records = iter_simulated_annealing(countdown_problem_class(), 'ID',
+                                           **kwargs)
+        recs = []
+        while True:
+            try:
+                recs.append(next(records))
+            except StopIteration as stop:
+                P, E, time = stop.value
+                break
+        assert [rec.energy for rec in recs] == list(E_ref) == list(E)
+        assert [rec.beta for rec in recs] == list(E.column('beta'))
+        assert [rec.n_steps for rec in recs] == [2] * (len(E) - 1) + [3]
+        assert P.energy == P_ref.energy
+        # stop early, on a criterion of the caller
+        P = countdown_problem_class()
+        records = iter_simulated_annealing(P, 'ID', **kwargs)
+        for rec in records:
+            if rec.energy <= 95.0:
+                break
+        records.close()
+        assert P.energy == 94.0
+        assert P.beta < 2.0
+
+    def test_sim_ann_with_propose(self):
+
+        class propose_problem_class(object):
+
+            def __init__(self):
+                self.energy = 100
+                self.beta = 0.0
+                self.n_rejected = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def propose(self):
+                return -1
+
+            def accept(self):
+                self.energy -= 1
+
+            def reject(self):
+                self.n_rejected += 1
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        class alternate_acceptance(object):
+            '''Accept every other move, and record the values of beta.'''
+
+            def __init__(self):
+                self.n_calls = 0
+                self.betas = []
+
+            def set_beta(self, beta):
+                self.betas.append(beta)
+
+            def accept(self, dE):
+                self.n_calls += 1
+                return self.n_calls % 2 == 0
+
+        acceptance = alternate_acceptance()
+        P, E, time = simulated_annealing(propose_problem_class(), 'ID',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=NullLog(), acceptance=acceptance)
+        assert acceptance.n_calls == 10 * len(E)
+        assert P.energy == 100 - 5 * len(E)
+        assert P.n_rejected == 5 * len(E)
+        assert acceptance.betas == list(E.column('beta'))
+        assert list(E.column('acc_ratio')) == [0.5] * len(E)
+        # default acceptance: Metropolis, which accepts all moves with dE<0
+        P, E, time = simulated_annealing(propose_problem_class(), 'ID',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=NullLog())
+        assert P.energy == 100 - 10 * len(E)
+        assert P.n_rejected == 0
+
+    def test_sim_ann_acceptance_requires_propose(self):
+
+        class empty_problem_class(object):
+
+            def __init__(self):
+                self.energy = 0.0
+                self.beta = 0.0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                return 1
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        try:
+            simulated_annealing(empty_problem_class(), 'ID', log=NullLog(),
+                                acceptance=Metropolis())
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('TypeError not raised')
+
+    def test_sim_ann_rejection_free(self):
+
+        class local_walk_class(object):
+            '''Random walk on the integers, with energy |x|.'''
+
+            def __init__(self):
+                self.x = 20
+                self.energy = 20
+                self.beta = 0.0
+                self.n_MC_moves = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                self.n_MC_moves += 1
+                return 0
+
+            def local_moves(self):
+                return [(dx, abs(self.x + dx) - self.energy)
+                        for dx in (-1, 1)]
+
+            def apply_move(self, dx):
+                self.x += dx
+                self.energy = abs(self.x)
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        # at very large beta, only the moves towards x=0 are accepted (one
+        # proposal out of two, on average), until the minimum is reached
+        P, E, time = simulated_annealing(local_walk_class(), 'ID',
+                                         beta_min=1e6, beta_max=2e6,
+                                         cooling_rate=1.0,
+                                         n_steps_per_T=1000, log=NullLog(),
+                                         rejection_free=True)
+        assert len(E) == 1
+        assert P.energy == 0
+        assert P.n_MC_moves == 0
+        assert E.column('acc_ratio')[0] == 20 / 1000.0
+        # after a temperature with acceptance ratio above the threshold,
+        # the usual MC moves are used: here MC_move rejects all moves,
+        # while most rejection-free moves are accepted, so that the two
+        # alternate
+        P, E, time = simulated_annealing(local_walk_class(), 'ID',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=50,
+                                         log=NullLog(), rejection_free=0.1)
+        assert len(E) > 2
+        assert P.n_MC_moves == 50 * ((len(E) + 1) // 2)
+        assert list(E.column('acc_ratio'))[::2] == [0.0] * len(E[::2])
+
+        class empty_problem_class(object):
+
+            def __init__(self):
+                self.energy = 0.0
+                self.beta = 0.0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                return 1
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        try:
+            simulated_annealing(empty_problem_class(), 'ID', log=NullLog(),
+                                rejection_free=True)
+        except TypeError:
+            pass
+        else:
+            raise AssertionError('TypeError not raised')
+
+    def test_sim_ann_rejection_free_with_energy_stats(self):
+
+        class descent_class(object):
+            '''Descent from x=5 to x=0, one step per move.'''
+
+            def __init__(self):
+                self.x = 5
+                self.energy = 5
+                self.beta = 0.0
+                self.n_local_moves = 0
+
+            def set_beta(self, beta):
+                self.beta = beta
+
+            def MC_move(self):
+                return 0
+
+            def local_moves(self):
+                self.n_local_moves += 1
+                if self.x == 0:
+                    return []
+                return [(-1, -1)]
+
+            def apply_move(self, dx):
+                self.x += dx
+                self.energy = self.x
+
+            def update_MC_parameters(self, acc_ratio):
+                pass
+
+        class recording_schedule_class(VarianceSchedule):
+
+            def __init__(self):
+                VarianceSchedule.__init__(self)
+                self.stats = []
+
+            def next_beta(self, beta, acc_ratio, E_mean, E_var):
+                self.stats.append((E_mean, E_var))
+                return VarianceSchedule.next_beta(self, beta, acc_ratio,
+                                                  E_mean, E_var)
+
+        schedule = recording_schedule_class()
+        P, E, time = simulated_annealing(descent_class(), 'ID',
+                                         beta_min=1.0, beta_max=1.2,
+                                         n_steps_per_T=10, log=NullLog(),
+                                         schedule=schedule,
+                                         rejection_free=True)
+        # energies 4, 3, 2, 1, 0, 0, 0, 0, 0, 0 after the ten proposals
+        # at the first temperature, and 0 afterwards
+        assert schedule.stats[0] == (1.0, 2.0)
+        assert schedule.stats[1:] == [(0.0, 0.0)] * (len(E) - 1)
+        # local_moves is called once per accepted move (and once when no
+        # move is left), rather than once per proposal
+        assert P.n_local_moves == 6 + (len(E) - 1)
@@ -0,0 +1,53 @@
+'''
+created: 2026-10-18
+'''
+
+import math
+import random
+from builtins import object
+from anneal import simulated_annealing, resume_simulated_annealing, NullLog
+
+
+class integer_walk_class(object):
+    '''
+    Random walk on the integers, with energy |x|.
+    '''
+
+    def __init__(self, x=20):
+        self.x = x
+        self.energy = abs(x)
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        xnew = self.x + random.choice([-1, 1])
+        dE = abs(xnew) - self.energy
+        if dE < 0 or random.random() < math.exp(- self.beta * dE):
+            self.x = xnew
+            self.energy = abs(xnew)
+            return 1
+        return 0
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class test_checkpoint(object):
+
+    def test_resume_reproduces_run(self, tmp_path):
+        checkpoint_file = str(tmp_path / 'ckpt.pickle')
+        random.seed(1)
+        P, E, time = simulated_annealing(integer_walk_class(), 'ckpt',
+                                         beta_min=0.1, beta_max=10.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=NullLog(),
+                                         checkpoint_file=checkpoint_file,
+                                         checkpoint_interval=20)
+        # the last checkpoint was written after 40 temperature steps
+        P2, E2, time2 = resume_simulated_annealing(checkpoint_file,
+                                                    log=NullLog())
+        assert list(E2) == list(E)
+        assert P2.x == P.x
+        assert list(E2.column('beta')) == list(E.column('beta'))
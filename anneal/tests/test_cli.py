@@ -0,0 +1,56 @@
+'''
+created: 2026-10-18
+'''
+
+import json
+from builtins import object
+from anneal import load_config, run_config, main
+
+
+CONFIG = {'problem': 'anneal.tests.test_multistart:rng_problem_class',
+          'ID': 'cli',
+          'n_runs': 3,
+          'seed': 5,
+          'annealing': {'beta_min': 1.0, 'beta_max': 2.0,
+                        'n_steps_per_T': 10,
+                        'schedule': {'class': 'GeometricSchedule',
+                                     'cooling_rate': 0.1}},
+          'sweep': {'n_steps_per_T': [1, 10], 'beta_max': [2.0, 4.0]}}
+
+
+class test_cli(object):
+
+    def test_run_config(self):
+        results = run_config(CONFIG, n_workers=1)
+        assert len(results['points']) == 4
+        assert len(results['runs']) == 12
+        assert results['points'][0]['params'] == {'beta_max': 2.0,
+                                                  'n_steps_per_T': 1}
+        for point in results['points']:
+            assert point['n_runs'] == 3
+        for run in results['runs']:
+            assert run['n_steps'] == (run['params']['n_steps_per_T'] *
+                                      run['n_temperatures'])
+        # one generator per run, for all the sweep points
+        energies = [run['energy'] for run in results['runs']]
+        assert len(set(energies)) == 12
+        json.dumps(results)
+
+    def test_parallel_is_deterministic(self):
+        serial = run_config(CONFIG, n_workers=1)
+        parallel = run_config(CONFIG, n_workers=2)
+        assert ([run['energy'] for run in serial['runs']] ==
+                [run['energy'] for run in parallel['runs']])
+
+    def test_main(self, tmp_path):
+        config_file = str(tmp_path / 'cli_config.json')
+        output = str(tmp_path / 'cli_results.json')
+        with open(config_file, 'w') as f:
+            json.dump(CONFIG, f)
+        assert load_config(config_file) == CONFIG
+        main([config_file, '--n-workers', '1', '--n-runs', '2',
+              '--output', output, '--quiet'])
+        with open(output) as f:
+            results = json.load(f)
+        assert len(results['runs']) == 8
+        assert results['config']['ID'] == 'cli'
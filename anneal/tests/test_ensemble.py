@@ -0,0 +1,39 @@
+'''
+created: 2026-10-18
+'''
+
+import numpy
+from builtins import object
+from anneal import ensemble_annealing, NullLog
+
+
+class quadratic_ensemble_class(object):
+    '''
+    Ensemble of walkers in two dimensions, with energy |x|^2.
+    '''
+
+    def __init__(self, n_walkers):
+        self.x = numpy.ones((n_walkers, 2)) * 5.0
+        self.energies = self.compute_energies(self.x)
+
+    def compute_energies(self, x):
+        return (x ** 2).sum(axis=1)
+
+    def propose(self, x, step):
+        return x + numpy.random.uniform(-1.0, 1.0, x.shape) * step[:, None]
+
+
+class test_ensemble_annealing(object):
+
+    def test_ensemble(self):
+        numpy.random.seed(1)
+        P = quadratic_ensemble_class(50)
+        P, E, time = ensemble_annealing(P, 'ens', beta_min=1e-1,
+                                        beta_max=1e2, cooling_rate=0.2,
+                                        n_steps_per_T=20, step=0.5,
+                                        quench_to_T0=True, n_steps_T0=20,
+                                        log=NullLog())
+        assert P.x.shape == (50, 2)
+        assert numpy.allclose(P.energies, P.compute_energies(P.x))
+        assert P.energies.max() < 1.0
+        assert E[-1] == P.energies.min()
@@ -0,0 +1,55 @@
+'''
+created: 2026-10-18
+'''
+
+from builtins import object
+from anneal import (simulated_annealing, EnergyEquilibration,
+                    AcceptanceEquilibration, NullLog)
+
+
+class frozen_problem_class(object):
+    '''
+    Problem where no move is ever accepted.
+    '''
+
+    def __init__(self):
+        self.energy = 1.0
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        return 0
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class test_equilibration(object):
+
+    def test_criteria(self):
+        eq = EnergyEquilibration(window=2, tol=0.5)
+        assert not eq.converged([1.0] * 3, [4.0, 3.0, 2.0])
+        assert not eq.converged([1.0] * 4, [4.0, 3.0, 2.0, 1.0])
+        assert eq.converged([1.0] * 4, [1.0, 2.0, 1.0, 2.0])
+        eq = AcceptanceEquilibration(window=2, acc_min=0.1)
+        assert not eq.converged([0.5, 0.0], [0.0, 0.0])
+        assert eq.converged([0.5, 0.0, 0.0], [0.0, 0.0, 0.0])
+
+    def test_sim_ann_early_stopping(self):
+        eq = AcceptanceEquilibration(block_size=10, min_steps=50, window=2)
+        P, E, time = simulated_annealing(frozen_problem_class(), 'eq',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1,
+                                         n_steps_per_T=1000, log=NullLog(),
+                                         equilibration=eq)
+        assert list(E.column('n_steps')) == [50.0] * len(E)
+
+    def test_sim_ann_stagnation(self):
+        P, E, time = simulated_annealing(frozen_problem_class(), 'eq',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.01,
+                                         n_steps_per_T=10, n_T_stagnation=3,
+                                         log=NullLog())
+        assert len(E) == 4
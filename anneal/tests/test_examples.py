@@ -0,0 +1,133 @@
+'''
+created: 2026-10-18
+'''
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+from builtins import object
+
+from anneal import simulated_annealing, NullLog
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        os.pardir, os.pardir, 'examples')
+
+
+def _import_example(folder, module):
+    path = os.path.join(EXAMPLES, folder)
+    if not os.path.isdir(path):
+        raise unittest.SkipTest('examples folder not available')
+    try:
+        import numpy  # noqa
+    except ImportError:
+        raise unittest.SkipTest('numpy not available')
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return __import__(module)
+
+
+class test_examples(object):
+
+    def test_potential_1d(self):
+        lib = _import_example('one_dimensional_potential', 'lib_potential_1d')
+        P, E, time = simulated_annealing(lib.Potential_1d(), 'Vx_1d',
+                                         cooling_rate=0.2, n_steps_per_T=50,
+                                         quench_to_T0=True, n_steps_T0=100,
+                                         log=NullLog())
+        assert P.energy <= E[-1]
+        assert P.energy == P.compute_energy(P.x)
+
+    def test_sudoku(self):
+        lib = _import_example('sudoku', 'lib_sudoku')
+        puzzle = os.path.join(EXAMPLES, 'sudoku', 'puzzle.dat')
+        for move in ('single', 'swap'):
+            S = lib.Sudoku(puzzle, seed=1, move=move)
+            S, E, time = simulated_annealing(S, 'Sudoku', beta_min=0.1,
+                                             beta_max=1.0, cooling_rate=0.1,
+                                             n_steps_per_T=100, E_min=0,
+                                             log=NullLog())
+            assert S.energy == S._total_energy()
+
+    def test_sudoku_is_reproducible(self):
+        lib = _import_example('sudoku', 'lib_sudoku')
+        puzzle = os.path.join(EXAMPLES, 'sudoku', 'puzzle.dat')
+        traces = []
+        for run in range(2):
+            S = lib.Sudoku(puzzle, seed=5, verbose=False)
+            S, E, time = simulated_annealing(S, 'Sudoku', beta_min=0.1,
+                                             beta_max=2.0, cooling_rate=0.1,
+                                             n_steps_per_T=100, log=NullLog())
+            traces.append(list(E))
+        assert traces[0] == traces[1]
+
+    def test_sudoku_move_type(self):
+        lib = _import_example('sudoku', 'lib_sudoku')
+        puzzle = os.path.join(EXAMPLES, 'sudoku', 'puzzle.dat')
+        for move, wrong in (('single', 'swap'), ('swap', 'single')):
+            S = lib.Sudoku(puzzle, seed=1, move=move, verbose=False)
+            getattr(S, 'MC_move_' + move)()
+            assert S.energy == S._total_energy()
+            try:
+                getattr(S, 'MC_move_' + wrong)()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('ValueError not raised')
+            assert S.energy == S._total_energy()
+
+    def test_sudoku_rejection_free(self):
+        lib = _import_example('sudoku', 'lib_sudoku')
+        puzzle = os.path.join(EXAMPLES, 'sudoku', 'puzzle.dat')
+        for move in ('single', 'swap'):
+            S = lib.Sudoku(puzzle, seed=1, move=move, verbose=False)
+            for ind in range(50):
+                move_changes, dE = S.local_moves()[ind]
+                E_old = S.energy
+                S.apply_move(move_changes)
+                assert S.energy - E_old == dE
+                assert S.energy == S._total_energy()
+            S, E, time = simulated_annealing(S, 'Sudoku', beta_min=1.0,
+                                             beta_max=10.0, cooling_rate=0.2,
+                                             n_steps_per_T=1000, E_min=0,
+                                             log=NullLog(),
+                                             rejection_free=0.2)
+            assert S.energy == S._total_energy()
+
+    def test_sudoku_stream(self, tmp_path):
+        filename = str(tmp_path / 'sudoku_stream.txt')
+        lib = _import_example('sudoku', 'lib_sudoku')
+        stream = _import_example('sudoku', 'solve_sudoku_stream')
+        grid = ''.join(str((3 * (i % 3) + i // 3 + j) % 9 + 1)
+                       for i in range(9) for j in range(9))
+        puzzles = ['.' + grid[1:40] + '0' + grid[41:],
+                   '\n'.join(' '.join(grid[9 * i:9 * i + 9])
+                              for i in range(9))]
+        with open(filename, 'w') as f:
+            f.write('# two puzzles\n%s\n\n%s\n' % tuple(puzzles))
+        grids = list(lib.read_puzzles(filename))
+        assert len(grids) == 2
+        assert grids[0][0, 0] == 0 and grids[0][4, 4] == 0
+        assert ''.join(str(n) for n in grids[1].flatten()) == grid
+        out = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            n_puzzles, n_solved = stream.solve_stream(
+                lib.read_puzzles(filename), out, n_workers=1,
+                beta_min=1.0, beta_max=2.0, n_steps_per_T=1000)
+        assert stdout.getvalue() == ''
+        assert (n_puzzles, n_solved) == (2, 2)
+        lines = out.getvalue().split('\n')
+        assert [line.split()[3] for line in lines[:2]] == [grid, grid]
+
+    def test_glm(self):
+        lib = _import_example('generalized_linear_model',
+                              'lib_generalized_linear_model')
+        import numpy
+        X = numpy.random.uniform(-1.0, 1.0, (20, 3))
+        Y = numpy.matmul(X, numpy.eye(3)) + 0.5
+        G, E, time = simulated_annealing(lib.GLM(X, Y), 'GLM',
+                                         beta_min=1.0, beta_max=10.0,
+                                         cooling_rate=0.1, n_steps_per_T=50,
+                                         log=NullLog())
+        assert abs(G.energy - G.compute_energy(G.Q, G.M)) < 1e-8
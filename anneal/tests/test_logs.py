@@ -0,0 +1,67 @@
+'''
+created: 2026-10-18
+'''
+
+import numpy
+from builtins import object
+from anneal import simulated_annealing, TextLog, NpyLog, NullLog
+
+
+class empty_problem_class(object):
+
+    def __init__(self):
+        self.energy = 0.0
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        return 1
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class test_logs(object):
+
+    def test_buffered_text_log(self, tmp_path):
+        filename = str(tmp_path / 'log_sim_ann_buffered.dat')
+        log = TextLog(filename, flush_interval=100)
+        P, E, time = simulated_annealing(empty_problem_class(), 'buffered',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=log)
+        with open(filename) as f:
+            lines = [line for line in f if not line.startswith('#')]
+        assert len(lines) == len(E)
+
+    def test_npy_log(self, tmp_path):
+        prefix = str(tmp_path / 'log_sim_ann_npy')
+        log = NpyLog(prefix)
+        P, E, time = simulated_annealing(empty_problem_class(), 'npy',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=log)
+        data = NpyLog.load(prefix)
+        assert list(data['energy']) == list(E)
+        assert list(data['beta']) == list(E.column('beta'))
+        assert (data['acc_ratio'] == 1.0).all()
+        assert numpy.load(prefix + '_energy.npy').dtype == numpy.float64
+
+    def test_npy_log_is_readable_before_close(self, tmp_path):
+        prefix = str(tmp_path / 'log')
+        log = NpyLog(prefix, flush_interval=2)
+        assert len(NpyLog.load(prefix)['beta']) == 0
+        for ind in range(5):
+            log.record(float(ind), 10.0 - ind, 0.5)
+        # the last record is still buffered
+        assert list(NpyLog.load(prefix)['energy']) == [10.0, 9.0, 8.0, 7.0]
+        log.close()
+        assert list(NpyLog.load(prefix)['beta']) == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    def test_null_log(self):
+        P, E, time = simulated_annealing(empty_problem_class(), 'null',
+                                         beta_min=1.0, beta_max=2.0,
+                                         cooling_rate=0.1, n_steps_per_T=10,
+                                         log=NullLog())
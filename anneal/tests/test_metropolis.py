@@ -0,0 +1,44 @@
+'''
+created: 2026-10-18
+'''
+
+import math
+import random
+from builtins import object
+from anneal import Metropolis
+
+
+class test_metropolis(object):
+
+    def test_downhill_always_accepted(self):
+        metropolis = Metropolis(beta=1e24, rng=random.Random(1))
+        assert all(metropolis.accept(dE) for dE in (0, -1, -1e-12, -1e9))
+        # no random number is needed for downhill moves
+        assert metropolis._block == []
+        assert metropolis.uniform() < 1.0
+        assert len(metropolis._block) == metropolis.block_size - 1
+
+    def test_acceptance_rate(self):
+        for discrete in (False, True):
+            metropolis = Metropolis(beta=0.5, rng=random.Random(2),
+                                    discrete=discrete, block_size=100)
+            n_steps = 20000
+            acc = sum(metropolis(2) for ind in range(n_steps))
+            assert abs(acc / float(n_steps) - math.exp(- 1.0)) < 0.02
+
+    def test_cache_is_cleared(self):
+        metropolis = Metropolis(beta=1.0, rng=random.Random(3),
+                                discrete=True)
+        metropolis.accept(1)
+        metropolis.accept(2)
+        assert metropolis._probabilities == {1: math.exp(-1.0),
+                                            2: math.exp(-2.0)}
+        metropolis.set_beta(0.0)
+        assert metropolis._probabilities == {}
+        assert all(metropolis.accept(5) for ind in range(10))
+
+    def test_same_stream(self):
+        rng = random.Random(4)
+        uniforms = [rng.random() for ind in range(10)]
+        metropolis = Metropolis(rng=random.Random(4), block_size=3)
+        assert [metropolis.uniform() for ind in range(10)] == uniforms
@@ -0,0 +1,109 @@
+'''
+created: 2026-10-18
+'''
+
+import random
+from builtins import object
+from anneal import multistart_annealing, spawn_rngs, TextLog
+
+
+class random_problem_class(object):
+    '''
+    Problem whose energy is drawn at random (at the module level, so
+    that it can be pickled and sent to worker processes).
+    '''
+
+    def __init__(self):
+        self.energy = random.random()
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        return 1
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class rng_problem_class(random_problem_class):
+    '''
+    Problem whose energy is drawn from its own random-number generator.
+    '''
+
+    def set_rng(self, rng):
+        self.energy = rng.random()
+
+
+class test_multistart_annealing(object):
+
+    def test_multistart_serial(self):
+        P, E, times = multistart_annealing(random_problem_class, 4, ID='ms',
+                                           n_workers=1, beta_min=1.0,
+                                           beta_max=2.0, cooling_rate=0.1,
+                                           n_steps_per_T=10, log='none')
+        assert len(E) == 4
+        assert len(times) == 4
+        assert P.energy == min(E)
+
+    def test_multistart_parallel_is_deterministic(self):
+        kwargs = dict(ID='ms', seed=123, beta_min=1.0, beta_max=2.0,
+                      cooling_rate=0.1, n_steps_per_T=10, log='none')
+        _, E_serial, _ = multistart_annealing(random_problem_class, 4,
+                                              n_workers=1, **kwargs)
+        _, E_parallel, _ = multistart_annealing(random_problem_class, 4,
+                                                n_workers=2, **kwargs)
+        assert E_serial == E_parallel
+
+    def test_multistart_with_rng_streams(self):
+        kwargs = dict(ID='ms', seed=7, beta_min=1.0, beta_max=2.0,
+                      cooling_rate=0.1, n_steps_per_T=10, log='none')
+        _, E_serial, _ = multistart_annealing(rng_problem_class, 4,
+                                              n_workers=1, **kwargs)
+        _, E_parallel, _ = multistart_annealing(rng_problem_class, 4,
+                                                n_workers=2, **kwargs)
+        assert E_serial == E_parallel
+        assert len(set(E_serial)) == 4
+        expected = [rng.random() for rng in spawn_rngs(7, 4)]
+        assert E_serial == expected
+
+    def test_multistart_keeps_global_state(self):
+        random.seed(5)
+        expected = random.random()
+        random.seed(5)
+        multistart_annealing(random_problem_class, 2, ID='ms', n_workers=1,
+                             beta_min=1.0, beta_max=2.0, cooling_rate=0.1,
+                             n_steps_per_T=10, log='none')
+        assert random.random() == expected
+
+    def test_multistart_with_file_logs(self, tmp_path):
+        def log(label):
+            return TextLog(str(tmp_path / ('%s.dat' % label)))
+        _, E, _ = multistart_annealing(random_problem_class, 3, ID='ms',
+                                       n_workers=1, beta_min=1.0,
+                                       beta_max=2.0, cooling_rate=0.1,
+                                       n_steps_per_T=10, log=log)
+        assert len(E) == 3
+        for run in range(3):
+            with open(str(tmp_path / ('ms_%i.dat' % run))) as f:
+                lines = f.read().splitlines()
+            records = [line for line in lines if not line.startswith('#')]
+            assert len(records) > 0
+
+    def test_multistart_parallel_text_logs(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        multistart_annealing(random_problem_class, 2, ID='ms', n_workers=2,
+                             beta_min=1.0, beta_max=2.0, cooling_rate=0.1,
+                             n_steps_per_T=10, log='text')
+        for run in range(2):
+            assert (tmp_path / ('log_sim_ann_ms_%i.dat' % run)).exists()
+
+    def test_multistart_unknown_log(self):
+        try:
+            multistart_annealing(random_problem_class, 2, n_workers=1,
+                                 log='csv')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('ValueError not raised')
@@ -0,0 +1,131 @@
+'''
+created: 2026-10-18
+'''
+
+import math
+import random
+from builtins import object
+from anneal import population_annealing, NullLog
+from anneal.population import _copy_plan, _systematic_counts
+
+
+class integer_walk_class(object):
+    '''
+    Random walk on the integers, with energy |x|, drawing its random
+    numbers from its own generator.
+    '''
+
+    def __init__(self, x=20):
+        self.x = x
+        self.energy = abs(x)
+        self.beta = 0.0
+        self.random = random.Random(0).random
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def set_rng(self, rng):
+        self.random = rng.random
+
+    def MC_move(self):
+        xnew = self.x + (1 if self.random() < 0.5 else -1)
+        dE = abs(xnew) - self.energy
+        if dE < 0 or self.random() < math.exp(- self.beta * dE):
+            self.x = xnew
+            self.energy = abs(xnew)
+            return 1
+        return 0
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+    def snapshot(self):
+        return self.x
+
+    def restore(self, state):
+        self.x = state
+        self.energy = abs(state)
+
+
+class empty_problem_class(object):
+    '''
+    Problem without the snapshot/restore methods (defined at module
+    level, so that it can be sent to worker processes).
+    '''
+
+    def __init__(self):
+        self.energy = 0.0
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        return 1
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class test_population_annealing(object):
+
+    def test_systematic_counts(self):
+        weights = [0.5, 0.0, 2.0, 1.0, 0.5]
+        for u in (0.0, 0.3, 0.999):
+            counts = _systematic_counts(weights, 8, u)
+            assert sum(counts) == 8
+            assert counts[1] == 0
+            for weight, count in zip(weights, counts):
+                expected = 8 * weight / sum(weights)
+                assert math.floor(expected) <= count <= math.ceil(expected)
+
+    def test_copy_plan(self):
+        # items 0-2 in chunk 0, items 3-5 in chunk 1
+        chunk_of = [0, 0, 0, 1, 1, 1]
+        local, remote = _copy_plan([3, 0, 0, 0, 2, 1], chunk_of)
+        assert sorted(local) == [(1, 0), (2, 0), (3, 4)]
+        assert remote == []
+        local, remote = _copy_plan([0, 0, 1, 4, 1, 0], chunk_of)
+        assert local == [(5, 3)]
+        assert sorted(remote) == [(0, 3), (1, 3)]
+
+    def test_pop_ann_reaches_E_min(self):
+        P, E, time = population_annealing(integer_walk_class, 'PA',
+                                          n_replicas=20, beta_min=0.1,
+                                          beta_max=10.0, cooling_rate=0.2,
+                                          n_steps_per_T=10, E_min=0, seed=1,
+                                          log=NullLog())
+        assert P.energy == 0
+        assert E[-1] == 0
+        assert list(E.column('n_steps')) == [10] * len(E)
+
+    def test_pop_ann_with_workers(self):
+        kwargs = dict(n_replicas=10, beta_min=0.1, beta_max=1.0,
+                      cooling_rate=0.5, n_steps_per_T=5, seed=2,
+                      log=NullLog())
+        P1, E1, time = population_annealing(integer_walk_class, 'PA',
+                                            n_workers=3, **kwargs)
+        P2, E2, time = population_annealing(integer_walk_class, 'PA',
+                                            n_workers=3, **kwargs)
+        assert len(E1) == 6
+        assert list(E1) == list(E2)
+        assert P1.energy == P2.energy == min(E1) == abs(P1.x)
+
+    def test_pop_ann_all_cores(self):
+        P, E, time = population_annealing(integer_walk_class, 'PA',
+                                          n_replicas=4, beta_min=0.1,
+                                          beta_max=1.0, cooling_rate=0.5,
+                                          n_steps_per_T=10, seed=2,
+                                          n_workers=None, log=NullLog())
+        assert P.energy == abs(P.x)
+        assert len(E) > 0
+
+    def test_pop_ann_requires_snapshot(self):
+        for n_workers in (1, 2):
+            try:
+                population_annealing(empty_problem_class, 'PA', n_replicas=4,
+                                     n_workers=n_workers, log=NullLog())
+            except TypeError:
+                pass
+            else:
+                raise AssertionError('TypeError not raised')
@@ -0,0 +1,72 @@
+'''
+created: 2026-10-18
+'''
+
+import math
+import random
+from builtins import object
+from anneal import (simulated_annealing, GeometricSchedule, LinearSchedule,
+                    LogarithmicSchedule, ArraySchedule, VarianceSchedule,
+                    LamSchedule, NullLog)
+
+
+class integer_walk_class(object):
+    '''
+    Random walk on the integers, with energy |x|.
+    '''
+
+    def __init__(self, x=20):
+        self.x = x
+        self.energy = abs(x)
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        xnew = self.x + random.choice([-1, 1])
+        dE = abs(xnew) - self.energy
+        if dE < 0 or random.random() < math.exp(- self.beta * dE):
+            self.x = xnew
+            self.energy = abs(xnew)
+            return 1
+        return 0
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class test_schedules(object):
+
+    def test_fixed_schedules(self):
+        assert GeometricSchedule(0.1).next_beta(2.0, 0.5, None, None) == 2.2
+        assert LinearSchedule(0.5).next_beta(2.0, 0.5, None, None) == 2.5
+        beta = LogarithmicSchedule(1.0).next_beta(math.log(3.0), 0.5,
+                                                  None, None)
+        assert abs(beta - math.log(4.0)) < 1e-12
+        S = ArraySchedule([1.0, 3.0, 2.0])
+        assert S.next_beta(1.0, 0.5, None, None) == 2.0
+        assert S.next_beta(3.0, 0.5, None, None) == float('inf')
+
+    def test_adaptive_schedules(self):
+        for S in [VarianceSchedule(lam=0.1, rate_min=0.01, rate_max=0.5),
+                  LamSchedule(lam=0.1, rate_min=0.01, rate_max=0.5)]:
+            # no fluctuations: largest step
+            assert S.next_beta(1.0, 0.0, 1.0, 0.0) == 1.5
+            # huge fluctuations: smallest step
+            assert S.next_beta(1.0, 0.44, 1.0, 1e12) == 1.01
+
+    def test_sim_ann_with_schedules(self):
+        betas = [0.1, 0.2, 0.5, 1.0, 2.0]
+        P, E, time = simulated_annealing(integer_walk_class(), 'schedule',
+                                         beta_min=0.1, beta_max=10.0,
+                                         n_steps_per_T=10,
+                                         schedule=ArraySchedule(betas),
+                                         log=NullLog())
+        assert list(E.column('beta')) == betas
+        P, E, time = simulated_annealing(integer_walk_class(), 'schedule',
+                                         beta_min=0.1, beta_max=10.0,
+                                         n_steps_per_T=10,
+                                         schedule=VarianceSchedule(),
+                                         log=NullLog())
+        assert E.column('beta')[-1] < 10.0
@@ -0,0 +1,121 @@
+'''
+created: 2026-10-18
+'''
+
+import math
+import random
+from builtins import object
+from anneal import parallel_tempering
+
+
+class integer_walk_class(object):
+    '''
+    Random walk on the integers, with energy |x|.
+    '''
+
+    def __init__(self, x=20):
+        self.x = x
+        self.energy = abs(x)
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        xnew = self.x + random.choice([-1, 1])
+        dE = abs(xnew) - self.energy
+        if dE < 0 or random.random() < math.exp(- self.beta * dE):
+            self.x = xnew
+            self.energy = abs(xnew)
+            return 1
+        return 0
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+class propose_walk_class(integer_walk_class):
+    '''
+    Same random walk, with the propose/accept/reject methods.
+    '''
+
+    def MC_move(self):
+        raise NotImplementedError
+
+    def propose(self):
+        self.xnew = self.x + random.choice([-1, 1])
+        return abs(self.xnew) - self.energy
+
+    def accept(self):
+        self.x = self.xnew
+        self.energy = abs(self.xnew)
+
+    def reject(self):
+        pass
+
+
+class failing_walk_class(integer_walk_class):
+    '''
+    Same random walk, whose MC moves fail.
+    '''
+
+    def MC_move(self):
+        raise ValueError('failing move')
+
+
+class test_parallel_tempering(object):
+
+    def test_par_temp_reaches_E_min(self, monkeypatch, tmp_path):
+        # the log file is written in the current directory
+        monkeypatch.chdir(tmp_path)
+        replicas = [integer_walk_class() for ind in range(4)]
+        P, E, time = parallel_tempering(replicas, 'PT',
+                                        betas=[0.1, 0.5, 1.0, 5.0],
+                                        n_steps_per_swap=10, n_swaps=1000,
+                                        E_min=0, seed=1)
+        assert P.energy == 0
+        assert E[-1] == 0
+
+    def test_par_temp_with_workers(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        replicas = [integer_walk_class() for ind in range(3)]
+        P, E, time = parallel_tempering(replicas, 'PT',
+                                        betas=[0.1, 1.0, 5.0],
+                                        n_steps_per_swap=10, n_swaps=20,
+                                        seed=1, n_workers=3)
+        assert len(E) == 20
+        assert P.energy == E[-1]
+
+    def test_par_temp_with_propose(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        replicas = [propose_walk_class() for ind in range(4)]
+        P, E, time = parallel_tempering(replicas, 'PT',
+                                        betas=[0.1, 0.5, 1.0, 5.0],
+                                        n_steps_per_swap=10, n_swaps=1000,
+                                        E_min=0, seed=1)
+        assert P.energy == 0
+        assert E[-1] == 0
+
+    def test_par_temp_groups_replicas(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        # five replicas in two worker processes
+        replicas = [propose_walk_class() for ind in range(5)]
+        P, E, time = parallel_tempering(replicas, 'PT',
+                                        betas=[0.1, 0.5, 1.0, 2.0, 5.0],
+                                        n_steps_per_swap=10, n_swaps=20,
+                                        seed=3, n_workers=2)
+        assert len(E) == 20
+        assert P.energy == E[-1]
+        assert P.energy == abs(P.x)
+
+    def test_par_temp_reports_worker_errors(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        replicas = [integer_walk_class(), failing_walk_class()]
+        try:
+            parallel_tempering(replicas, 'PT', betas=[0.1, 1.0],
+                               n_steps_per_swap=10, n_swaps=20, seed=1,
+                               n_workers=2)
+        except ValueError as exc:
+            assert str(exc) == 'failing move'
+        else:
+            raise AssertionError('ValueError not raised')
@@ -0,0 +1,28 @@
+'''
+created: 2026-10-18
+'''
+
+from builtins import object
+from anneal import Trace
+
+
+class test_trace(object):
+
+    def test_trace_growth(self):
+        T = Trace(capacity=2)
+        for ind in range(10):
+            T.append(float(ind), 10.0 - ind, 0.5, 0.1 * ind)
+        assert len(T) == 10
+        assert T[0] == 10.0
+        assert T[-1] == 1.0
+        assert T[:2] == [10.0, 9.0]
+        assert list(T.column('beta')) == [float(ind) for ind in range(10)]
+
+    def test_trace_to_numpy(self):
+        T = Trace()
+        T.append(1.0, 2.0, 0.5, 0.0)
+        arrays = T.to_numpy()
+        assert sorted(arrays.keys()) == sorted(Trace.columns)
+        assert arrays['energy'].tolist() == [2.0]
+        # arrays share memory with the trace
+        assert not arrays['energy'].flags['OWNDATA']
@@ -0,0 +1,63 @@
+'''
+created: 2026-10-18
+'''
+
+import math
+from builtins import object
+from anneal import tune_annealing, time_to_solution
+
+
+class countdown_problem_class(object):
+    '''
+    Problem whose energy decreases by one at each MC move, from 10 to 0
+    (at the module level, so that it can be sent to worker processes).
+    '''
+
+    def __init__(self):
+        self.energy = 10
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        if self.energy > 0:
+            self.energy -= 1
+        return 1
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+KWARGS = dict(beta_min=1.0, beta_max=2.0, cooling_rate=0.1)
+
+
+class test_tuning(object):
+
+    def test_time_to_solution(self):
+        assert time_to_solution(2.0, 0.0) == float('inf')
+        assert time_to_solution(2.0, 1.0) == 2.0
+        assert time_to_solution(2.0, 0.995) == 2.0
+        tts = time_to_solution(2.0, 0.5)
+        assert abs(tts - 2.0 * math.log(0.01) / math.log(0.5)) < 1e-12
+
+    def test_grid(self):
+        # 8 temperature steps: 1 move per step is not enough, 5 and 20
+        # moves per step are, and the first one is cheaper
+        best, results = tune_annealing(
+            countdown_problem_class, {'n_steps_per_T': [1, 20, 5]}, 0,
+            n_runs=2, n_workers=1, **KWARGS)
+        assert best == {'n_steps_per_T': 5}
+        assert [res['success_probability'] for res in results] == [0, 1, 1]
+        assert [res['moves_to_solution'] for res in results] == [
+            float('inf'), 20, 10]
+        assert results[0]['energy_mean'] == 2
+
+    def test_halving(self):
+        grid = {'n_steps_per_T': [1, 3, 5, 20]}
+        for n_workers in (1, 2):
+            best, results = tune_annealing(
+                countdown_problem_class, grid, 0, n_runs=1, method='halving',
+                eta=2, n_workers=n_workers, **KWARGS)
+            assert best == {'n_steps_per_T': 5}
+            assert [res['n_runs'] for res in results] == [1, 2, 4, 1]
@@ -0,0 +1,73 @@
+'''
+created: 2026-10-18
+'''
+
+import os
+from builtins import object
+from anneal.workers import _WorkerPool, _RemoteTraceback
+
+
+class counter_class(object):
+    '''
+    Object served by the worker processes.
+    '''
+
+    def __init__(self, start):
+        if start < 0:
+            raise ValueError('negative start')
+        self.value = start
+
+    def add(self, n):
+        self.value += n
+        return self.value
+
+    def fail(self):
+        raise KeyError('fail')
+
+    def exit(self):
+        os._exit(3)
+
+
+class test_workers(object):
+
+    def test_calls(self):
+        pool = _WorkerPool(counter_class, [(0,), (10,)])
+        try:
+            assert pool.call([(0, 'add', (1,)), (1, 'add', (2,))]) == [1, 12]
+            assert pool.call([(1, 'add', (3,))]) == [15]
+        finally:
+            pool.close()
+
+    def test_errors_are_raised_again(self):
+        pool = _WorkerPool(counter_class, [(0,), (10,)])
+        try:
+            try:
+                pool.call([(0, 'add', (1,)), (1, 'fail', ())])
+            except KeyError as exc:
+                assert isinstance(exc.__cause__, _RemoteTraceback)
+                assert 'in fail' in exc.__cause__.tb
+            else:
+                raise AssertionError('KeyError not raised')
+            # the workers keep serving calls
+            assert pool.call([(0, 'add', (1,)), (1, 'add', (1,))]) == [2, 11]
+        finally:
+            pool.close()
+
+    def test_construction_errors(self):
+        try:
+            _WorkerPool(counter_class, [(0,), (-1,)])
+        except ValueError as exc:
+            assert str(exc) == 'negative start'
+        else:
+            raise AssertionError('ValueError not raised')
+
+    def test_worker_exit(self):
+        pool = _WorkerPool(counter_class, [(0,), (10,)])
+        try:
+            pool.call([(0, 'exit', ())])
+        except RuntimeError as exc:
+            assert 'exit code 3' in str(exc)
+        else:
+            raise AssertionError('RuntimeError not raised')
+        finally:
+            pool.close()
@@ -0,0 +1,91 @@
+'''Run traces for anneal.
+
+This module contains the Trace class, which stores the history of a
+simulated-annealing run in memory.
+'''
+
+import array
+
+__all__ = ['Trace']
+
+
+class Trace(object):
+    '''
+    History of a simulated-annealing run, with one entry per temperature.
+
+    Each quantity is stored in a preallocated array of doubles, whose
+    capacity is doubled when needed. For backwards compatibility, a Trace
+    also behaves as the sequence of its energies (e.g. E[-1] is the final
+    energy, and len(E) is the number of entries).
+
+    Attributes
+    ----------
+    columns : tuple of str
+        Names of the stored quantities: beta, energy, acc_ratio, time
+        (elapsed time at the end of the temperature step, in seconds),
+        n_steps (number of MC moves performed at that temperature) and
+        cpu_time (process CPU time at the end of the temperature step, in
+        seconds; cpu_time / time measures the parallel efficiency).
+
+    Methods
+    -------
+    append(beta, energy, acc_ratio, time, n_steps=0, cpu_time=0.0)
+        Add an entry.
+    column(name)
+        Return a memoryview of one of the quantities.
+    to_numpy()
+        Return a dictionary of numpy arrays (without copying data).
+    '''
+
+    columns = ('beta', 'energy', 'acc_ratio', 'time', 'n_steps', 'cpu_time')
+
+    def __init__(self, capacity=256):
+        self._n = 0
+        self._capacity = max(int(capacity), 1)
+        self._data = [self._empty(self._capacity) for name in self.columns]
+
+    @staticmethod
+    def _empty(capacity):
+        return array.array('d', bytes(8 * capacity))
+
+    def _grow(self):
+        # Replace (rather than resize) the arrays, so that views returned
+        # by column() or to_numpy() remain valid.
+        self._capacity *= 2
+        new_data = []
+        for old in self._data:
+            new = self._empty(self._capacity)
+            new[:self._n] = old[:self._n]
+            new_data.append(new)
+        self._data = new_data
+
+    def append(self, beta, energy, acc_ratio, time, n_steps=0,
+               cpu_time=0.0):
+        if self._n == self._capacity:
+            self._grow()
+        values = (beta, energy, acc_ratio, time, n_steps, cpu_time)
+        for column, value in zip(self._data, values):
+            column[self._n] = value
+        self._n += 1
+
+    def column(self, name):
+        return memoryview(self._data[self.columns.index(name)])[:self._n]
+
+    def to_numpy(self):
+        import numpy
+        return dict((name, numpy.frombuffer(self.column(name), dtype='f8'))
+                    for name in self.columns)
+
+    def __len__(self):
+        return self._n
+
+    def __getitem__(self, ind):
+        if isinstance(ind, slice):
+            return self.column('energy')[ind].tolist()
+        return self.column('energy')[ind]
+
+    def __iter__(self):
+        return iter(self.column('energy'))
+
+    def __repr__(self):
+        return 'Trace(%i entries)' % self._n
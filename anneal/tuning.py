@@ -0,0 +1,194 @@
+'''Parameter tuning for anneal.
+
+This module contains tune_annealing, which runs simulated_annealing for
+several settings of its parameters (e.g. beta_min, beta_max, cooling_rate
+and n_steps_per_T), over a grid or via successive halving, and reports the
+success probability and time-to-solution of each setting.
+'''
+
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+from .logs import NullLog
+from .multistart import _single_run
+from .rng import _spawn_rngs_if_available
+
+__all__ = ['tune_annealing', 'time_to_solution']
+
+
+def _grid(sweep):
+    '''
+    Return the list of all the combinations of the values in sweep (a
+    dict of lists), as dicts; sweep keys are sorted, for a stable order.
+    '''
+    names = sorted(sweep)
+    return [dict(zip(names, values))
+            for values in itertools.product(*[sweep[name]
+                                              for name in names])]
+
+
+def time_to_solution(t_run, p_success, confidence=0.99):
+    '''
+    Return the expected cost of reaching the target with probability
+    confidence, by repeating independent runs of cost t_run (a time, or a
+    number of moves) and success probability p_success; this is
+    t_run * log(1 - confidence) / log(1 - p_success), and at least t_run.
+    '''
+    if p_success <= 0.0:
+        return float('inf')
+    if p_success >= confidence:
+        return t_run
+    return t_run * math.log(1.0 - confidence) / math.log(1.0 - p_success)
+
+
+def _tuning_run(factory, label, seed, rng, kwargs):
+    '''
+    Perform a single run, and return its final energy, elapsed time and
+    number of MC moves.
+    '''
+    P, E, elapsed_time = _single_run(factory, label, seed, rng,
+                                     dict(kwargs, log=NullLog()))
+    return float(P.energy), elapsed_time, int(sum(E.column('n_steps')))
+
+
+def _summary(params, runs, E_target, confidence):
+    energies = [run[0] for run in runs]
+    n_runs = len(runs)
+    n_success = sum(1 for E in energies if E <= E_target)
+    p_success = n_success / float(n_runs)
+    time_mean = sum(run[1] for run in runs) / n_runs
+    moves_mean = sum(run[2] for run in runs) / float(n_runs)
+    return {'params': params,
+            'n_runs': n_runs,
+            'n_success': n_success,
+            'success_probability': p_success,
+            'energy_min': min(energies),
+            'energy_mean': sum(energies) / n_runs,
+            'time_mean': time_mean,
+            'moves_mean': moves_mean,
+            'time_to_solution': time_to_solution(time_mean, p_success,
+                                                 confidence),
+            'moves_to_solution': time_to_solution(moves_mean, p_success,
+                                                  confidence)}
+
+
+def tune_annealing(factory, grid, E_target, n_runs=10, method='grid', eta=3,
+                   cost='moves', confidence=0.99, ID='tune', seed=0,
+                   n_workers=None, **kwargs):
+    '''
+    Compare several settings of the simulated_annealing parameters.
+
+    Parameters
+    ----------
+    factory : callable
+        Function (or class) with no arguments, which returns a new
+        instance of the problem class (see simulated_annealing). When
+        n_workers != 1, it must be picklable (e.g. a module-level function).
+    grid : dict
+        Lists of values of simulated_annealing parameters, e.g.
+        {'cooling_rate': [1e-2, 1e-3], 'n_steps_per_T': [100, 1000]}; all
+        their combinations are tested.
+    E_target : float
+        A run succeeds if its final energy is <= E_target; unless E_min is
+        given, runs stop when they reach E_target.
+    n_runs : int, optional
+        Number of runs per setting; for method='halving', number of runs
+        per setting in the first round (default: 10)
+    method : str, optional
+        'grid' (n_runs runs for each setting) or 'halving' (successive
+        halving: after each round, only the best 1/eta of the settings are
+        kept, and their number of runs is multiplied by eta, until a single
+        setting is left) (default: 'grid')
+    eta : int, optional
+        Reduction factor for method='halving' (default: 3)
+    cost : str, optional
+        Cost used to rank the settings, 'moves' (number of MC moves, which
+        does not depend on the machine load) or 'time' (default: 'moves')
+    confidence : float, optional
+        Target success probability for the time-to-solution (default: 0.99)
+    ID : str, optional
+        Label for the problem under study (default: 'tune')
+    seed : int, optional
+        Base seed; run i (counting all the runs, in order of submission)
+        gets the i-th generator of anneal.rng.spawn_rngs(seed, ...), or
+        the global seed seed + i, as in multistart_annealing (default: 0)
+    n_workers : int, optional
+        Number of worker processes; if None, use all available cores; if
+        1, perform all runs in the current process (default: None)
+    **kwargs
+        Further keyword arguments, passed to simulated_annealing (runs are
+        not logged).
+
+    Returns
+    -------
+    best : dict
+        Parameters of the cheapest setting (see below; for
+        method='halving', the last setting left)
+    results : list
+        One dict per setting, in the order of the grid, with entries
+        params, n_runs, n_success, success_probability, energy_min,
+        energy_mean, time_mean and moves_mean (per run), and
+        time_to_solution and moves_to_solution (see time_to_solution).
+        Settings are ranked by the cost-to-solution, then by success
+        probability and mean energy (so that, if no setting reaches
+        E_target, the best is the one with the lowest mean energy).
+
+    '''
+    if method not in ('grid', 'halving'):
+        raise ValueError('Unknown method %r (valid: grid, halving)' % method)
+    if cost not in ('moves', 'time'):
+        raise ValueError('Unknown cost %r (valid: moves, time)' % cost)
+    if method == 'halving' and eta < 2:
+        raise ValueError('eta must be at least 2, not %r' % eta)
+    kwargs.setdefault('E_min', E_target)
+    settings = _grid(grid)
+    runs = [[] for params in settings]
+    results = [None] * len(settings)
+
+    def key(ind):
+        res = results[ind]
+        return (res['%s_to_solution' % cost], - res['success_probability'],
+                res['energy_mean'])
+
+    executor = None
+    if n_workers != 1:
+        executor = ProcessPoolExecutor(max_workers=n_workers)
+    try:
+        alive = list(range(len(settings)))
+        n_runs_target = n_runs
+        n_submitted = 0
+        while True:
+            # run the missing runs of all alive settings, in one batch
+            jobs = []
+            for ind in alive:
+                for run in range(len(runs[ind]), n_runs_target):
+                    jobs.append((ind, run))
+            rngs = _spawn_rngs_if_available(seed, len(jobs), n_submitted)
+            args = []
+            for (ind, run), rng in zip(jobs, rngs):
+                run_kwargs = dict(kwargs)
+                run_kwargs.update(settings[ind])
+                args.append((factory, '%s_%i_%i' % (ID, ind, run),
+                             seed + n_submitted, rng, run_kwargs))
+                n_submitted += 1
+            if executor is None:
+                outcomes = [_tuning_run(*arg) for arg in args]
+            else:
+                futures = [executor.submit(_tuning_run, *arg)
+                           for arg in args]
+                outcomes = [future.result() for future in futures]
+            for (ind, run), outcome in zip(jobs, outcomes):
+                runs[ind].append(outcome)
+            for ind in alive:
+                results[ind] = _summary(settings[ind], runs[ind], E_target,
+                                        confidence)
+            if method == 'grid' or len(alive) == 1:
+                break
+            alive = sorted(alive, key=key)[:max(1, len(alive) // eta)]
+            n_runs_target *= eta
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    best = min(alive, key=key)
+    return settings[best], results
@@ -22,6 +22,7 @@ CLASSIFIERS = ['Development Status :: 3 - Alpha',
                'License :: OSI Approved :: MIT License',
                'Operating System :: OS Independent',
                'Programming Language :: Python',
+               'Programming Language :: Python :: 3',
                'Topic :: Scientific/Engineering']
 
 # Description should be a one-liner:
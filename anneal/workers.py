@@ -0,0 +1,141 @@
+'''Worker processes for anneal.
+
+This module contains _WorkerPool, which keeps one object in each of a set
+of worker processes and serves calls to its methods through pipes. It is
+shared by parallel_tempering (a group of replicas per process) and
+population_annealing (a part of the population per process). Exceptions
+raised in a worker are sent back, and raised again in the main process.
+'''
+
+import multiprocessing
+import pickle
+import traceback
+
+__all__ = []
+
+
+class _RemoteTraceback(Exception):
+    '''
+    Traceback of an exception raised in a worker process (set as the
+    __cause__ of the exception raised again in the main process).
+    '''
+
+    def __init__(self, tb):
+        Exception.__init__(self, tb)
+        self.tb = tb
+
+    def __str__(self):
+        return '\n"""\n%s"""' % self.tb
+
+
+def _error_reply(exc):
+    '''
+    Return the reply for an exception, which is sent back as it is if it
+    can be pickled, and as a RuntimeError otherwise.
+    '''
+    tb = traceback.format_exc()
+    try:
+        pickle.dumps(exc)
+    except Exception:
+        exc = RuntimeError('%s: %s' % (type(exc).__name__, exc))
+    return ('error', exc, tb)
+
+
+def _serve(conn, build, args):
+    '''
+    Build an object with build(*args), and serve the calls to its methods
+    received from conn as (method, args) pairs, until ('stop', ()). The
+    replies are ('ok', result) or ('error', exception, traceback), and the
+    first one is sent after the object is built.
+    '''
+    try:
+        try:
+            obj = build(*args)
+            conn.send(('ok', None))
+        except Exception as exc:
+            conn.send(_error_reply(exc))
+            return
+        while True:
+            method, args = conn.recv()
+            if method == 'stop':
+                return
+            try:
+                conn.send(('ok', getattr(obj, method)(*args)))
+            except Exception as exc:
+                conn.send(_error_reply(exc))
+    except (EOFError, OSError):
+        # the main process has closed its end of the pipe
+        pass
+    finally:
+        conn.close()
+
+
+class _WorkerPool(object):
+    '''
+    One object per worker process, the k-th one built (in its process) as
+    build(*args_list[k]).
+    '''
+
+    def __init__(self, build, args_list):
+        self.conns = []
+        self.procs = []
+        try:
+            for args in args_list:
+                parent_conn, child_conn = multiprocessing.Pipe()
+                proc = multiprocessing.Process(
+                    target=_serve, args=(child_conn, build, args))
+                proc.daemon = True
+                proc.start()
+                # only the worker keeps its end, so that recv() fails as
+                # soon as the worker exits
+                child_conn.close()
+                self.conns.append(parent_conn)
+                self.procs.append(proc)
+            self._receive(range(len(self.conns)))
+        except BaseException:
+            self.close()
+            raise
+
+    def call(self, calls):
+        '''
+        Perform the calls, given as (worker, method, args) tuples, and
+        return their results. There should be at most one call per worker,
+        so that the workers run in parallel.
+        '''
+        for worker, method, args in calls:
+            try:
+                self.conns[worker].send((method, args))
+            except (BrokenPipeError, ConnectionResetError):
+                # the worker has exited, which _receive reports
+                pass
+        return self._receive([worker for worker, method, args in calls])
+
+    def _receive(self, workers):
+        # all the replies are received before raising, so that the pipes
+        # stay in sync
+        replies = [self._recv(worker) for worker in workers]
+        for reply in replies:
+            if reply[0] == 'error':
+                exc, tb = reply[1], reply[2]
+                raise exc from _RemoteTraceback(tb)
+        return [reply[1] for reply in replies]
+
+    def _recv(self, worker):
+        try:
+            return self.conns[worker].recv()
+        except (EOFError, ConnectionResetError):
+            proc = self.procs[worker]
+            proc.join()
+            return ('error', RuntimeError('Worker process %i exited '
+                                          'unexpectedly (exit code %s).' %
+                                          (worker, proc.exitcode)), '')
+
+    def close(self):
+        for conn in self.conns:
+            try:
+                conn.send(('stop', ()))
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            conn.close()
+        for proc in self.procs:
+            proc.join()
@@ -0,0 +1,200 @@
+'''
+program: bench_anneal.py
+notes: benchmarks for simulated_annealing and for the example problem
+       classes (moves per second, time to reach a target energy, peak
+       memory), written to a JSON file with a stable structure.
+
+usage: python bench_anneal.py [--quick] [--output bench_anneal.json]
+'''
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, ROOT)
+for folder in ('one_dimensional_potential', 'sudoku',
+               'generalized_linear_model'):
+    sys.path.insert(0, os.path.join(ROOT, 'examples', folder))
+
+from anneal import simulated_annealing, ArraySchedule, NullLog  # noqa
+from anneal.version import __version__  # noqa
+from lib_potential_1d import Potential_1d  # noqa
+from lib_sudoku import Sudoku  # noqa
+from lib_generalized_linear_model import GLM  # noqa
+
+SCHEMA_VERSION = 1
+
+
+class EmptyProblem(object):
+    '''
+    Problem with no cost at all, to measure the overhead of the engine.
+    '''
+
+    def __init__(self):
+        self.energy = 0.0
+        self.beta = 0.0
+
+    def set_beta(self, beta):
+        self.beta = beta
+
+    def MC_move(self):
+        return 1
+
+    def update_MC_parameters(self, acc_ratio):
+        pass
+
+
+def make_potential_1d(seed):
+    return Potential_1d(rng=numpy.random.default_rng(seed))
+
+
+def make_sudoku(n_blanks, seed):
+    '''
+    Sudoku instance, obtained by blanking n_blanks cells of a valid grid.
+    '''
+    rng = random.Random(seed)
+    grid = numpy.array([[(3 * (i % 3) + i // 3 + j) % 9 + 1
+                         for j in range(9)] for i in range(9)])
+    for ind in rng.sample(range(81), n_blanks):
+        grid[ind // 9, ind % 9] = 0
+    return Sudoku(grid, seed=seed + 1, verbose=False)
+
+
+def make_glm(D, N, seed):
+    '''
+    GLM instance with N noisy data points in D dimensions.
+    '''
+    rng = numpy.random.default_rng(seed)
+    Q = rng.uniform(-1.0, 1.0, D)
+    M = rng.uniform(-1.0, 1.0, size=(D, D))
+    X = rng.uniform(-1.0, 1.0, (N, D))
+    Y = numpy.matmul(X, M) + Q
+    Y += rng.uniform(-0.1, 0.1, size=Y.shape)
+    return GLM(X, Y, rng=rng)
+
+
+def moves_per_second(factory, beta, n_steps, n_T):
+    '''
+    Run n_T temperature steps of n_steps moves at (almost) fixed beta,
+    and return the number of moves per second and the peak memory.
+
+    The timed run is done without memory tracing, which would dominate
+    the elapsed time; the peak memory comes from a second (untimed) run
+    on a new instance.
+    '''
+    betas = [beta * (1.0 + 1e-9 * ind) for ind in range(n_T)]
+
+    def run(P):
+        return simulated_annealing(
+            P, 'bench', beta_min=betas[0], beta_max=float('inf'),
+            n_steps_per_T=n_steps, schedule=ArraySchedule(betas),
+            log=NullLog())
+
+    P, E, elapsed_time = run(factory())
+    P = factory()
+    tracemalloc.start()
+    run(P)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'moves_per_second': n_steps * n_T / elapsed_time,
+            'peak_memory_bytes': peak_memory}
+
+
+def time_to_target(factory, E_target, n_runs, **kwargs):
+    '''
+    Run n_runs annealings with E_min=E_target, and return the success
+    probability and the mean elapsed time.
+    '''
+    times = []
+    n_success = 0
+    for run in range(n_runs):
+        P = factory(run)
+        P, E, elapsed_time = simulated_annealing(P, 'bench', E_min=E_target,
+                                                 log=NullLog(), **kwargs)
+        times.append(elapsed_time)
+        n_success += int(min(E) <= E_target)
+    return {'success_probability': n_success / float(n_runs),
+            'mean_time_s': sum(times) / n_runs,
+            'n_runs': n_runs}
+
+
+def run_benchmarks(quick=False):
+    scale = 1 if quick else 5
+    n_runs = 2 if quick else 5
+    results = []
+
+    def add(problem, params, metrics):
+        results.append({'problem': problem, 'params': params,
+                        'metrics': metrics})
+
+    # engine overhead
+    for n_steps in (1, 100):
+        add('engine', {'n_steps_per_T': n_steps},
+            moves_per_second(EmptyProblem, 1.0, n_steps, 2000 * scale))
+    # one-dimensional potential
+    add('potential_1d', {},
+        moves_per_second(lambda: make_potential_1d(0), 1.0, 1000,
+                         20 * scale))
+    add('potential_1d', {'E_target': 1e-3},
+        time_to_target(make_potential_1d, 1e-3, n_runs, beta_min=1e-2,
+                       beta_max=1e3, cooling_rate=1e-2, n_steps_per_T=200))
+    # sudoku
+    for n_blanks in (30, 45):
+        add('sudoku', {'n_blanks': n_blanks},
+            moves_per_second(lambda: make_sudoku(n_blanks, 0), 1.0, 1000,
+                             20 * scale))
+        add('sudoku', {'n_blanks': n_blanks, 'E_target': 0},
+            time_to_target(lambda seed: make_sudoku(n_blanks, seed), 0,
+                           n_runs, beta_min=0.1, beta_max=5e2,
+                           cooling_rate=1e-2, n_steps_per_T=1000))
+    # generalized linear model
+    for D, N in ((5, 100), (25, 100), (25, 1000)):
+        add('glm', {'D': D, 'N': N},
+            moves_per_second(lambda: make_glm(D, N, 0), 1e2, 200,
+                             5 * scale))
+        # the noise contributes about D * 0.1^2 / 3 to the energy
+        E_target = 2.0 * D * 0.1 ** 2 / 3.0
+        add('glm', {'D': D, 'N': N, 'E_target': E_target},
+            time_to_target(lambda seed: make_glm(D, N, seed), E_target,
+                           n_runs, beta_min=1e-1, beta_max=1e4,
+                           cooling_rate=5e-2, n_steps_per_T=200))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks for simulated_annealing and the examples.')
+    parser.add_argument('--quick', action='store_true',
+                        help='fewer and shorter runs')
+    parser.add_argument('--output', default='bench_anneal.json',
+                        help='output JSON file')
+    args = parser.parse_args()
+    report = {'schema_version': SCHEMA_VERSION,
+              'anneal_version': __version__,
+              'python_version': platform.python_version(),
+              'numpy_version': numpy.__version__,
+              'platform': platform.platform(),
+              'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'quick': args.quick,
+              'results': run_benchmarks(quick=args.quick)}
+    with open(args.output, 'w') as out:
+        json.dump(report, out, indent=2, sort_keys=True)
+        out.write('\n')
+    for res in report['results']:
+        print(res['problem'], json.dumps(res['params'], sort_keys=True),
+              json.dumps(res['metrics'], sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
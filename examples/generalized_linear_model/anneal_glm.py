@@ -27,12 +27,12 @@ Y += numpy.random.uniform(-eps, eps, size=Y.shape)
 G = GLM(X, Y)
 
 # perform annealing
-print 'SA start'
+print('SA start')
 G, E, et = simulated_annealing(G, 'GLM',
                                beta_min=1e-1, beta_max=1e4,
                                cooling_rate=5e-2, n_steps_per_T=200,
                                quench_to_T0=True, n_steps_T0=10000)
-print 'SA end (elapsed: %.1f s)' % et
+print('SA end (elapsed: %.1f s)' % et)
 
 
 # plot energy
@@ -66,7 +66,7 @@ for ax in axs.flatten():
 ax_cb = fig.add_axes([0.25, 0.95, 0.5, 0.025])
 CB = fig.colorbar(im1, cax=ax_cb, orientation='horizontal')
 CB.ax.tick_params(labelsize=10, direction='in',
-                  labeltop='on', labelbottom='off')
+                  labeltop=True, labelbottom=False)
 CB.ax.xaxis.set_ticks_position('top')
 CB.ax.xaxis.set_label_position('top')
 CB.ax.xaxis.labelpad = 10
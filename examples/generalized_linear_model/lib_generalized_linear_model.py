@@ -6,15 +6,15 @@ author: tc
 created: 2016-04-19 -- 9:30 CEST
 '''
 
-import random
 import numpy
-import math
 
 from builtins import object   # python 2/3 compatibility
 
+from anneal import Metropolis, seeded_random
+
 
 class GLM(object):
-    '''
+    r'''
     Generalized Linear Model instance.
 
     Given two set of D-dimensional vectors x_0,..,x_N and y_0,..,y_N,
@@ -45,21 +45,43 @@ class GLM(object):
         Current energy.
     dQ, dM : float
         Step-size for Monte Carlo moves in dQ and DM.
+    residuals : array
+        Current values of y - (x*M + Q), an NxD array (updated
+        incrementally by MC_move, and recomputed exactly by
+        update_MC_parameters).
+    rng : numpy.random.Generator
+        Random-number generator.
+    metropolis : anneal.Metropolis
+        Metropolis acceptance test.
 
     Methods
     -------
 
     compute_energy(Q, M)
         Compute energy.
+    compute_residuals(Q, M)
+        Compute y - (x*M + Q).
     set_beta(beta)
         Set beta to a new value.
+    set_rng(rng)
+        Set the random-number generator.
     update_MC_parameters(acc_ratio)
         Update dQ and dM.
+    propose()
+        Propose a Monte Carlo move, and return dE.
+    accept()
+        Accept the proposed move.
+    reject()
+        Reject the proposed move.
     MC_move()
         Perform a Monte Carlo move.
+    snapshot()
+        Return a copy of the current configuration.
+    restore(state)
+        Go back to a configuration returned by snapshot().
     '''
 
-    def __init__(self, x_points, y_points, Q0=None, M0=None):
+    def __init__(self, x_points, y_points, Q0=None, M0=None, rng=None):
 
         # problem parameters
         self.x = x_points.copy()
@@ -71,28 +93,46 @@ class GLM(object):
         self.dQ = 0.005
         self.dM = 0.005
         if Q0 is not None:
-            self.Q = Q0
+            self.Q = numpy.array(Q0, dtype=float)
         else:
             self.Q = numpy.zeros(self.D)
         if M0 is not None:
-            self.M = M0
+            self.M = numpy.array(M0, dtype=float)
         else:
             self.M = numpy.eye(self.D)
         self.Q0 = self.Q.copy()
         self.M0 = self.M.copy()
 
         # initialization
-        self.energy = self.compute_energy(self.Q, self.M)
-        self.beta = 1e8
+        if rng is None:
+            rng = numpy.random.default_rng()
+        self.set_rng(rng)
+        self.residuals = self.compute_residuals(self.Q, self.M)
+        self.energy = self._residuals_energy(self.residuals)
+        self.set_beta(1e8)
+
+    def compute_residuals(self, Q, M):
+        return self.y - (numpy.matmul(self.x, M) + Q)
 
     def compute_energy(self, Q, M):
-        dev_sq_i = ((self.y - (numpy.matmul(self.x, M) + Q)) ** 2).sum(axis=1)
-        return dev_sq_i.mean()
+        return self._residuals_energy(self.compute_residuals(Q, M))
+
+    def _residuals_energy(self, residuals):
+        return numpy.einsum('ij,ij->', residuals, residuals) / self.N
 
     def set_beta(self, beta):
         self.beta = beta
+        self.metropolis.set_beta(beta)
+
+    def set_rng(self, rng):
+        self.rng = rng
+        self._random = seeded_random(rng)
+        self.metropolis = Metropolis(getattr(self, 'beta', 0.0), rng=rng)
 
     def update_MC_parameters(self, acc_ratio):
+        # remove the round-off accumulated by the incremental updates
+        self.residuals = self.compute_residuals(self.Q, self.M)
+        self.energy = self._residuals_energy(self.residuals)
         if acc_ratio < 0.2 and self.dM > 0.001:
             self.dM *= 0.90909090909090909090
         elif acc_ratio > 0.8 and self.dM < 2.0:
@@ -102,22 +142,47 @@ class GLM(object):
         elif acc_ratio > 0.8 and self.dQ < 2.0:
             self.dQ *= 1.1
 
-    def MC_move(self):
-        Mnew = self.M.copy()
-        Qnew = self.Q.copy()
-        if random.uniform(0.0, 1.0) < 0.7:
-            row = random.randrange(self.D)
-            Mnew[row, :] += numpy.random.uniform(-self.dM, self.dM,
-                                                 size=self.D)
+    def propose(self):
+        # A change delta in the row M[row, :] shifts the residuals by
+        # -x[:, row] * delta, a change delta in Q shifts them by -delta:
+        # both updates cost O(N*D), rather than O(N*D^2).
+        if self._random.uniform(0.0, 1.0) < 0.7:
+            row = self._random.randrange(self.D)
+            delta = self.rng.uniform(-self.dM, self.dM, size=self.D)
+            res_new = self.residuals - numpy.outer(self.x[:, row], delta)
         else:
-            Qnew += numpy.random.uniform(-self.dQ, self.dQ, Qnew.shape)
-        E_old = self.energy
-        E_new = self.compute_energy(Qnew, Mnew)
-        dE = E_new - E_old
-        if dE < 0.0 or random.random() < math.exp(- self.beta * dE):
-            self.M = Mnew.copy()
-            self.Q = Qnew.copy()
-            self.energy = E_new
-            return 1
+            row = None
+            delta = self.rng.uniform(-self.dQ, self.dQ, self.D)
+            res_new = self.residuals - delta
+        E_new = self._residuals_energy(res_new)
+        self._proposal = (row, delta, res_new, E_new)
+        return E_new - self.energy
+
+    def accept(self):
+        row, delta, res_new, E_new = self._proposal
+        if row is None:
+            self.Q += delta
         else:
-            return 0
+            self.M[row, :] += delta
+        self.residuals = res_new
+        self.energy = E_new
+        self._proposal = None
+
+    def reject(self):
+        self._proposal = None
+
+    def MC_move(self):
+        if self.metropolis.accept(self.propose()):
+            self.accept()
+            return 1
+        self.reject()
+        return 0
+
+    def snapshot(self):
+        return self.Q.copy(), self.M.copy(), self.energy
+
+    def restore(self, state):
+        Q, M, self.energy = state
+        self.Q[:] = Q
+        self.M[:, :] = M
+        self.residuals = self.compute_residuals(self.Q, self.M)
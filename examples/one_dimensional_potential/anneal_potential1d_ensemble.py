@@ -0,0 +1,33 @@
+'''
+program: anneal_potential1d_ensemble.py
+notes: performs many simulated-annealing runs at once, as an ensemble of
+       walkers moved in lock-step.
+'''
+
+import numpy
+import matplotlib.pyplot as plt
+
+from lib_potential_1d import Potential_1d_ensemble
+from anneal import ensemble_annealing
+
+
+P = Potential_1d_ensemble(n_walkers=1000)
+P, E, et = ensemble_annealing(P, 'Vx_1d_ensemble', beta_min=1e-2,
+                              beta_max=1e2, cooling_rate=0.2,
+                              n_steps_per_T=50, step=0.2, step_min=0.01,
+                              step_max=1.0)
+print('Ensemble annealing end (elapsed time: %.1f s)' % et)
+
+# plot histogram
+plt.hist(P.x, bins=40, range=[-10.0, 10.0], density=True, alpha=0.8)
+# plot potential
+x = numpy.linspace(-10.0, 10.0, 1000)
+plt.plot(x, P.compute_energies(x) / 100.0, 'r', lw=2, label='$V(x)$')
+# finalize plot
+plt.grid()
+plt.xlim(-10.0, 10.0)
+plt.title('Ensemble-annealing results for $\\min V(x)$')
+plt.xlabel('$x$', fontsize=18)
+plt.legend(loc='best')
+plt.savefig('fig_example_ensemble.png')
+plt.show()
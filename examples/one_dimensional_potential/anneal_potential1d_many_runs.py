@@ -22,7 +22,7 @@ for run in range(20):
     xmin.append(P.x)
 
 # plot histogram
-plt.hist(xmin, bins=20, range=[-10.0, 10.0], normed=True, alpha=0.8)
+plt.hist(xmin, bins=20, range=[-10.0, 10.0], density=True, alpha=0.8)
 # plot potential
 x = numpy.linspace(-10.0, 10.0, 1000)
 Vx = numpy.array([P.compute_energy(j) for j in x])
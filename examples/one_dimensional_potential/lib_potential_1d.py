@@ -2,13 +2,15 @@
 program: lib_potential_1d.py
 author: tc
 created: 2016-04-19 -- 12 CEST
-notes: Class for one-dimensional potential, to be used in simulated annealing.
+notes: Classes for one-dimensional potential, to be used in simulated annealing.
 '''
 
-import random
 import math
+import numpy
 from builtins import object   # python 2/3 compatibility
 
+from anneal import Metropolis, seeded_random
+
 
 class Potential_1d(object):
     '''
@@ -24,6 +26,10 @@ class Potential_1d(object):
         Current inverse temperature.
     dx : float
         Step-size for Monte Carlo moves.
+    rng : numpy.random.Generator
+        Random-number generator.
+    metropolis : anneal.Metropolis
+        Metropolis acceptance test.
 
     Methods
     -------
@@ -32,23 +38,40 @@ class Potential_1d(object):
         Compute energy.
     set_beta(beta)
         Set beta to a new value.
+    set_rng(rng)
+        Set the random-number generator.
     update_MC_parameters(acc_ratio)
         Update dx.
     MC_move()
         Perform a Monte Carlo move.
+    MC_sweep(n_steps)
+        Perform n_steps Monte Carlo moves.
+    snapshot()
+        Return a copy of the current configuration.
+    restore(state)
+        Go back to a configuration returned by snapshot().
     '''
 
-    def __init__(self):
+    def __init__(self, rng=None):
         self.x = 10.0
-        self.beta = 1e8
         self.energy = self.compute_energy(self.x)
         self.dx = 0.2
+        if rng is None:
+            rng = numpy.random.default_rng()
+        self.set_rng(rng)
+        self.set_beta(1e8)
 
     def compute_energy(self, _x):
         return 0.5 * _x ** 2 * math.cos(_x) ** 2
 
     def set_beta(self, beta):
         self.beta = beta
+        self.metropolis.set_beta(beta)
+
+    def set_rng(self, rng):
+        self.rng = rng
+        self._random = seeded_random(rng)
+        self.metropolis = Metropolis(getattr(self, 'beta', 0.0), rng=rng)
 
     def update_MC_parameters(self, acc_ratio):
         if acc_ratio < 0.2 and self.dx > 0.01:
@@ -57,13 +80,75 @@ class Potential_1d(object):
             self.dx *= 1.1
 
     def MC_move(self):
-        xnew = random.uniform(self.x - self.dx, self.x + self.dx)
+        xnew = self._random.uniform(self.x - self.dx, self.x + self.dx)
         E_old = self.energy
         E_new = self.compute_energy(xnew)
         dE = E_new - E_old
-        if dE < 0.0 or random.random() < math.exp(- self.beta * dE):
+        if self.metropolis.accept(dE):
             self.x = xnew
             self.energy = E_new
             return 1
         else:
             return 0
+
+    def MC_sweep(self, n_steps):
+        # same as calling MC_move() n_steps times, with local lookups
+        uniform, accept = self._random.uniform, self.metropolis.accept
+        compute_energy = self.compute_energy
+        x, E_old, dx = self.x, self.energy, self.dx
+        acc = 0
+        for step in range(n_steps):
+            xnew = uniform(x - dx, x + dx)
+            E_new = compute_energy(xnew)
+            dE = E_new - E_old
+            if accept(dE):
+                x, E_old = xnew, E_new
+                acc += 1
+        self.x, self.energy = x, E_old
+        return acc
+
+    def snapshot(self):
+        return self.x, self.energy
+
+    def restore(self, state):
+        self.x, self.energy = state
+
+
+class Potential_1d_ensemble(object):
+    '''
+    Ensemble of walkers in the one-dimensional potential, to be used with
+    anneal.ensemble_annealing.
+
+    Attributes
+    ----------
+    x : array
+        Current configurations of the walkers.
+    energies : array
+        Energies of the current configurations.
+
+    Methods
+    -------
+
+    compute_energies(x)
+        Compute energies.
+    propose(x, dx)
+        Propose new configurations.
+    set_rng(rng)
+        Set the random-number generator.
+    '''
+
+    def __init__(self, n_walkers, rng=None):
+        self.x = numpy.ones(n_walkers) * 10.0
+        self.energies = self.compute_energies(self.x)
+        if rng is None:
+            rng = numpy.random.default_rng()
+        self.rng = rng
+
+    def set_rng(self, rng):
+        self.rng = rng
+
+    def compute_energies(self, x):
+        return 0.5 * x ** 2 * numpy.cos(x) ** 2
+
+    def propose(self, x, dx):
+        return x + self.rng.uniform(-dx, dx)
@@ -13,7 +13,8 @@ from builtins import object
 
 import numpy
 import random
-import math
+
+from anneal import Metropolis, seeded_random
 
 
 class Sudoku(object):
@@ -29,67 +30,135 @@ class Sudoku(object):
         Current value of the energy.
     beta : float
         Current value of the inverse temperature.
+    move : str
+        Type of Monte Carlo move, either 'single' (change the entry of a
+        non-fixed cell) or 'swap' (swap the entries of two non-fixed
+        cells in the same box).
+    rng : numpy.random.Generator
+        Random-number generator.
+    metropolis : anneal.Metropolis
+        Metropolis acceptance test, with cached exponentials.
+    row_counts, col_counts, box_counts : list
+        9x10 tables, where e.g. row_counts[i][n] is the number of
+        occurrences of the digit n in the i-th row.
 
     Methods
     -------
     set_beta()
         Set the value of the beta attribute.
+    set_rng(rng)
+        Set the random-number generator.
+    propose()
+        Propose a Monte Carlo move of the chosen type, and return dE.
+    accept()
+        Accept the proposed move.
+    reject()
+        Reject the proposed move.
+    local_moves()
+        Return all the moves of the chosen type, with their dE.
+    apply_move(move)
+        Perform one of the moves returned by local_moves().
     MC_move()
         Perform a Monte Carlo move.
+    MC_move_single()
+        Perform a Monte Carlo move which changes a single cell.
+    MC_move_swap()
+        Perform a Monte Carlo move which swaps two cells in a box.
     update_MC_parameters()
         Empty method (required for the class to be used by `anneal`).
+    snapshot()
+        Return a copy of the current configuration.
+    restore(state)
+        Go back to a configuration returned by snapshot().
     print_puzzle()
         Print the currest puzzle configuration.
+    to_line()
+        Return the current configuration as a string of 81 digits.
 
     Notes
     -----
-    _load_puzzle(filename)
-        Load a puzzle from the file <filename>.
+    _load_puzzle(input_file)
+        Load a puzzle from the file (or array) <input_file>.
     _fill_puzzle()
         Fill all empty cells.
+    _fill_boxes()
+        Fill all empty cells, so that each box includes all digits.
     _get_box(i, j)
-        
+        Return the box of cell (i, j).
+    _init_counts()
+        Initialize the occupation tables.
     _total_energy()
-    _local_energy(i ,j)
+        Compute the energy from the occupation tables.
+    _set_cell(i, j, n)
+        Change the entry of cell (i, j), and return the energy change.
+    _local_moves_single(), _local_moves_swap()
+        Return all the single-cell moves or swaps, with their dE.
     '''
 
-    def __init__(self, input_file, seed=0):
+    def __init__(self, input_file, seed=0, move='single', rng=None,
+                 verbose=True):
         '''
         Initialize an instance of the Sudoku class.
 
         Arguments
         ---------
-        input_file : str
-            File with the puzzle.
+        input_file : str or array
+            File with the puzzle, or 9x9 array with the puzzle (zeros
+            for empty cells).
         seed : int
             Seed for the random-number generator (if 0, a random value
             is chosen as seed).
+        move : str
+            Type of Monte Carlo move, 'single' or 'swap'.
+        rng : numpy.random.Generator
+            Random-number generator (if given, seed is not used).
+        verbose : bool
+            If False, do not print anything.
         '''
-        print('[sudoku] init')
-        if seed == 0:
-            seed = random.randrange(99999999)
-        random.seed(seed)
-        print('[sudoku] random seed: %i' % seed)
+        self.verbose = verbose
+        self._print('[sudoku] init')
+        if rng is None:
+            if seed == 0:
+                seed = random.randrange(99999999)
+            rng = numpy.random.default_rng(seed)
+            self._print('[sudoku] random seed: %i' % seed)
+        self.set_rng(rng)
         # initialize and fill puzzle
+        if move not in ('single', 'swap'):
+            raise ValueError('Unknown move type: %s' % move)
+        self.move = move
         self._load_puzzle(input_file)
-        self._fill_puzzle()
+        if move == 'swap':
+            self._fill_boxes()
+        else:
+            self._fill_puzzle()
         assert self.puzzle.min() >= 1
         assert self.puzzle.max() <= 9
         # initialize other members
+        self._init_counts()
         self.energy = self._total_energy()
-        self.beta = 1.0e4
+        self.set_beta(1.0e4)
+
+    def _print(self, message):
+        if self.verbose:
+            print(message)
 
-    def _load_puzzle(self, filename):
-        ''' Reads puzzle from input file.
+    def _load_puzzle(self, input_file):
+        ''' Reads puzzle from input file (or array).
         '''
-        x = numpy.loadtxt(filename, dtype=numpy.int)
-        assert x.shape == (9, 9), 'ERROR: wrong-shape puzzle in %s' % filename
+        if isinstance(input_file, str):
+            x = numpy.loadtxt(input_file, dtype=int)
+            source = input_file
+        else:
+            x = numpy.array(input_file, dtype=int)
+            source = 'array'
+        assert x.shape == (9, 9), 'ERROR: wrong-shape puzzle in %s' % source
         assert x.max() <= 9, 'ERROR: puzzle.max() = %i' % x.max()
         assert x.min() >= 0, 'ERROR: puzzle.min() = %i' % x.min()
         self.puzzle = x[:, :]
         number_clues = (x > 0).sum()
-        print('[sudoku] read puzzle from %s (%i clues)' % (filename,
-                                                           number_clues))
+        self._print('[sudoku] read puzzle from %s (%i clues)' % (
+            source, number_clues))
 
     def _fill_puzzle(self):
         ''' Replaces zeros with random numbers in [1,..,9].
@@ -102,51 +171,102 @@ class Sudoku(object):
             for j in range(9):
                 if not self.puzzle[i, j]:
                     self.non_clues.append([i, j])
-                    self.puzzle[i, j] = tot.pop(random.randrange(len(tot)))
+                    self.puzzle[i, j] = tot.pop(
+                        self._random.randrange(len(tot)))
         assert tot == [], 'ERROR, in _fill_puzzle()'
         assert self.puzzle.min() > 0, 'ERROR, in _fill_puzzle()'
 
+    def _fill_boxes(self):
+        ''' Replaces zeros with the missing numbers of each box.
+        '''
+        self.non_clues = []
+        self.box_non_clues = []
+        for k in range(9):
+            i0, j0 = (k // 3) * 3, (k % 3) * 3
+            box = self._get_box(i0, j0)
+            missing = [n for n in range(1, 10) if n not in box]
+            self._random.shuffle(missing)
+            cells = []
+            for i in range(i0, i0 + 3):
+                for j in range(j0, j0 + 3):
+                    if not self.puzzle[i, j]:
+                        cells.append([i, j])
+                        self.puzzle[i, j] = missing.pop()
+            assert missing == [], 'ERROR, in _fill_boxes()'
+            self.non_clues.extend(cells)
+            if len(cells) > 1:
+                self.box_non_clues.append(cells)
+
     def _get_box(self, i, j):
         ''' Returns entries of the 3x3 box for the cell (i, j).
         '''
         return self.puzzle[(i // 3) * 3:(i // 3 + 1) * 3,
                            (j // 3) * 3:(j // 3 + 1) * 3]
 
+    def _init_counts(self):
+        ''' Fills the occupation tables of rows, columns and boxes.
+        '''
+        self.row_counts = [[0] * 10 for ind in range(9)]
+        self.col_counts = [[0] * 10 for ind in range(9)]
+        self.box_counts = [[0] * 10 for ind in range(9)]
+        for i in range(9):
+            for j in range(9):
+                n = self.puzzle[i, j]
+                self.row_counts[i][n] += 1
+                self.col_counts[j][n] += 1
+                self.box_counts[(i // 3) * 3 + j // 3][n] += 1
+
     def _total_energy(self):
         ''' Computes the total energy of a puzzle.
+
+        Each row, column and box contributes with the number of
+        occurrences of each repeated digit.
         '''
         E = 0
-        list_i = list(range(9))
-        list_j = [0, 3, 6, 1, 4, 7, 2, 5, 8]
-        for ind in range(9):
-            E += self._local_energy(list_i[ind], list_j[ind])
+        for table in (self.row_counts, self.col_counts, self.box_counts):
+            for counts in table:
+                E += sum(c for c in counts if c > 1)
         return E
 
-    def _local_energy(self, i, j):
-        ''' Computes the local energy of the cell (i, j).
+    # energy change when the count of a digit in a unit goes from c to c-1
+    # (_dE_remove[c]) or from c to c+1 (_dE_add[c])
+    _dE_remove = [0, 0, -2] + [-1] * 8
+    _dE_add = [0, 2] + [1] * 9
+
+    def _set_cell(self, i, j, n_new):
+        ''' Sets the cell (i, j) to n_new, updates the occupation tables
+        and returns the energy change.
         '''
-        E = 0
-        # check row
-        row = self.puzzle[i, :]
-        occupations = numpy.bincount(row)
-        occupations = occupations[occupations > 1]
-        E += sum(occupations)
-        # check column
-        column = self.puzzle[:, j]
-        occupations = numpy.bincount(column)
-        occupations = occupations[occupations > 1]
-        E += sum(occupations)
-        # check box
-        box = self._get_box(i, j).flatten()
-        occupations = numpy.bincount(box)
-        occupations = occupations[occupations > 1]
-        E += sum(occupations)
-        return E
+        n_old = self.puzzle[i, j]
+        if n_old == n_new:
+            return 0
+        self.puzzle[i, j] = n_new
+        dE_remove, dE_add = self._dE_remove, self._dE_add
+        dE = 0
+        for counts in (self.row_counts[i], self.col_counts[j],
+                       self.box_counts[(i // 3) * 3 + j // 3]):
+            dE += dE_remove[counts[n_old]]
+            counts[n_old] -= 1
+            dE += dE_add[counts[n_new]]
+            counts[n_new] += 1
+        return dE
 
     def set_beta(self, beta):
         ''' Sets a new value of beta.
         '''
         self.beta = beta
+        self.metropolis.set_beta(beta)
+
+    def set_rng(self, rng):
+        ''' Sets the random-number generator.
+
+        Energy changes are integers, so the Metropolis acceptance
+        probabilities are cached.
+        '''
+        self.rng = rng
+        self._random = seeded_random(rng)
+        self.metropolis = Metropolis(getattr(self, 'beta', 0.0), rng=rng,
+                                     discrete=True)
 
     def update_MC_parameters(self, dummy):
         '''
@@ -155,23 +275,164 @@ class Sudoku(object):
         '''
         pass
 
+    def propose(self):
+        '''
+        Proposes a Monte Carlo move of the chosen type (or nothing, if no
+        cell can be changed), applies it to the puzzle and returns the
+        energy change; the move is completed by accept() or reject().
+        '''
+        if self.move == 'swap':
+            if not self.box_non_clues:
+                return self._propose_nothing()
+            return self._propose_swap()
+        if not self.non_clues:
+            return self._propose_nothing()
+        return self._propose_single()
+
+    def _propose_nothing(self):
+        self._undo = ()
+        self._dE = 0
+        return 0
+
+    def _propose_single(self):
+        ''' Replaces one of the non-fixed cells with a random entry.
+        '''
+        i, j = self._random.choice(self.non_clues)
+        self._undo = ((i, j, self.puzzle[i, j]),)
+        self._dE = self._set_cell(i, j, self._random.randrange(1, 10))
+        return self._dE
+
+    def _propose_swap(self):
+        ''' Swaps the entries of two non-fixed cells in the same box
+        (which preserves the digit occurrences in each box).
+        '''
+        (i1, j1), (i2, j2) = self._random.sample(
+            self._random.choice(self.box_non_clues), 2)
+        n1, n2 = self.puzzle[i1, j1], self.puzzle[i2, j2]
+        self._undo = ((i2, j2, n2), (i1, j1, n1))
+        self._dE = self._set_cell(i1, j1, n2) + self._set_cell(i2, j2, n1)
+        return self._dE
+
+    def accept(self):
+        ''' Accepts the proposed move.
+        '''
+        self.energy += self._dE
+
+    def reject(self):
+        ''' Rejects the proposed move, and restores the previous puzzle.
+        '''
+        for i, j, n in self._undo:
+            self._set_cell(i, j, n)
+
+    def local_moves(self):
+        '''
+        Returns the list of all the moves of the chosen type from the
+        current configuration, as (move, dE) pairs, for rejection-free
+        annealing; a move is a tuple of (i, j, n) changes.
+
+        The moves which leave the puzzle unchanged (n == n_old, or a swap
+        of two equal entries) are left out, and the swaps are listed (and
+        so chosen uniformly) over all the pairs of non-fixed cells in the
+        same box, while propose() first picks a box and then a pair in it.
+        The rejection-free moves are thus not the same Markov chain as
+        MC_move().
+        '''
+        if self.move == 'swap':
+            return self._local_moves_swap()
+        return self._local_moves_single()
+
+    def _local_moves_single(self):
+        puzzle = self.puzzle
+        dE_remove, dE_add = self._dE_remove, self._dE_add
+        moves = []
+        for i, j in self.non_clues:
+            row = self.row_counts[i]
+            col = self.col_counts[j]
+            box = self.box_counts[(i // 3) * 3 + j // 3]
+            n_old = puzzle[i, j]
+            dE_old = (dE_remove[row[n_old]] + dE_remove[col[n_old]] +
+                      dE_remove[box[n_old]])
+            for n in range(1, 10):
+                if n != n_old:
+                    moves.append((((i, j, n),), dE_old + dE_add[row[n]] +
+                                  dE_add[col[n]] + dE_add[box[n]]))
+        return moves
+
+    def _local_moves_swap(self):
+        # the energy change of each swap is computed by performing it and
+        # undoing it
+        puzzle = self.puzzle
+        set_cell = self._set_cell
+        moves = []
+        for cells in self.box_non_clues:
+            for ind, (i1, j1) in enumerate(cells):
+                n1 = puzzle[i1, j1]
+                for i2, j2 in cells[ind + 1:]:
+                    n2 = puzzle[i2, j2]
+                    if n1 == n2:
+                        continue
+                    dE = set_cell(i1, j1, n2) + set_cell(i2, j2, n1)
+                    set_cell(i2, j2, n2)
+                    set_cell(i1, j1, n1)
+                    moves.append((((i1, j1, n2), (i2, j2, n1)), dE))
+        return moves
+
+    def apply_move(self, move):
+        '''
+        Performs a move returned by local_moves().
+        '''
+        for i, j, n in move:
+            self.energy += self._set_cell(i, j, n)
+
+    def _metropolis_move(self, dE):
+        if self.metropolis.accept(dE):
+            self.accept()
+            return 1
+        self.reject()
+        return 0
+
     def MC_move(self):
+        '''
+        Performs a Monte Carlo move of the chosen type, and accepts/rejects
+        it according to Metropolis rule.
+        '''
+        return self._metropolis_move(self.propose())
+
+    def _check_move(self, move):
+        if self.move != move:
+            raise ValueError('MC_move_%s needs a puzzle created with '
+                             'move=%r (this one has move=%r)'
+                             % (move, move, self.move))
+
+    def MC_move_single(self):
         '''
         Proposes to replace one of the non-fixed cells with a random
-        entry, and accepts/rejects according to Metropolis rule.
+        entry, and accepts/rejects according to Metropolis rule; only
+        valid for move='single' (ValueError otherwise).
         '''
-        i, j = random.choice(self.non_clues)
-        E_ij_old = self._local_energy(i, j)
-        n_old = self.puzzle[i, j]
-        self.puzzle[i, j] = random.randrange(1, 10)
-        E_ij_new = self._local_energy(i, j)
-        dE = E_ij_new - E_ij_old
-        if dE < 0.0 or random.uniform(0.0, 1.0) < math.exp(- self.beta * dE):
-            self.energy += dE
-            return 1
-        else:
-            self.puzzle[i, j] = n_old
-            return 0
+        self._check_move('single')
+        return self._metropolis_move(self._propose_single())
+
+    def MC_move_swap(self):
+        '''
+        Proposes to swap the entries of two non-fixed cells in the same
+        box, and accepts/rejects according to Metropolis rule; only valid
+        for move='swap' (ValueError otherwise).
+        '''
+        self._check_move('swap')
+        return self._metropolis_move(self._propose_swap())
+
+    def snapshot(self):
+        ''' Returns a copy of the current puzzle.
+        '''
+        return self.puzzle.copy()
+
+    def restore(self, state):
+        ''' Goes back to a puzzle returned by snapshot().
+        '''
+        self.puzzle[:, :] = state
+        self._init_counts()
+        self.energy = self._total_energy()
 
     def print_puzzle(self):
         for i in range(9):
@@ -179,6 +440,38 @@ class Sudoku(object):
                 print(self.puzzle[i, j], end=' ')
             print()
 
+    def to_line(self):
+        return ''.join(str(n) for n in self.puzzle.flatten())
+
+
+def read_puzzles(filename):
+    '''
+    Lazily read the puzzles in a file, and yield them as 9x9 arrays.
+
+    Each puzzle is either a single line of 81 characters (digits, with
+    '0' or '.' for empty cells) or a block of 9 lines of 9 digits,
+    possibly separated by spaces (as in puzzle.dat). Empty lines and lines
+    starting with '#' are ignored.
+    '''
+    rows = []
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            digits = line.replace(' ', '').replace('.', '0')
+            if len(digits) == 81 and not rows:
+                yield numpy.array([int(c) for c in digits]).reshape(9, 9)
+            elif len(digits) == 9:
+                rows.append([int(c) for c in digits])
+                if len(rows) == 9:
+                    yield numpy.array(rows)
+                    rows = []
+            else:
+                raise ValueError('Invalid line in %s: %r' % (filename, line))
+    if rows:
+        raise ValueError('Incomplete puzzle at the end of %s' % filename)
+
 
 if __name__ == '__main__':
     S = Sudoku('puzzle.dat', seed=1)
@@ -0,0 +1,115 @@
+'''
+program: solve_sudoku_stream.py
+notes: solve many sudoku puzzles, read lazily from a multi-puzzle file (see
+       lib_sudoku.read_puzzles) and distributed over a pool of worker
+       processes. Each output line reads
+           <index> <energy> <elapsed time> <81-digit configuration>
+       where index is the position of the puzzle in the input file, and
+       energy=0 means that the puzzle is solved; lines are written as
+       soon as each puzzle is done (hence not necessarily in order).
+
+usage: python solve_sudoku_stream.py puzzles.txt [--output solutions.txt]
+                                     [--n-workers N] [--seed SEED]
+'''
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import (ProcessPoolExecutor, FIRST_COMPLETED,
+                                wait)
+
+from anneal import simulated_annealing, spawn_rngs, NullLog
+from lib_sudoku import Sudoku, read_puzzles
+
+ANNEALING = dict(beta_min=0.1, beta_max=5e2, cooling_rate=1e-2,
+                 n_steps_per_T=1000, E_min=0)
+
+
+def solve_puzzle(index, puzzle, seed, move, kwargs):
+    '''
+    Solve a single puzzle, with the index-th random-number generator
+    derived from seed, and return index, energy, elapsed time and final
+    configuration.
+    '''
+    rng = spawn_rngs(seed, 1, start=index)[0]
+    S = Sudoku(puzzle, move=move, rng=rng, verbose=False)
+    S, E, elapsed_time = simulated_annealing(S, 'sudoku_%i' % index,
+                                             log=NullLog(), **kwargs)
+    return index, int(S.energy), elapsed_time, S.to_line()
+
+
+def solve_stream(puzzles, out, n_workers=None, seed=0, move='single',
+                 max_pending=None, **kwargs):
+    '''
+    Solve the puzzles of the iterable puzzles, and write a line per
+    puzzle to the file object out, as soon as it is done.
+
+    At most max_pending puzzles (default: 4 per worker) are read ahead of
+    the ones being solved, so that puzzles can come from an arbitrarily
+    long stream; with n_workers=1, puzzles are solved in the current
+    process. Further keyword arguments are passed to simulated_annealing
+    (default: ANNEALING). Return the number of puzzles and of solved
+    puzzles.
+    '''
+    kwargs = dict(ANNEALING, **kwargs)
+    n_puzzles = n_solved = 0
+
+    def write(result):
+        index, energy, elapsed_time, line = result
+        out.write('%i %i %.4f %s\n' % (index, energy, elapsed_time, line))
+        return int(energy == 0)
+
+    if n_workers == 1:
+        for index, puzzle in enumerate(puzzles):
+            n_solved += write(solve_puzzle(index, puzzle, seed, move,
+                                           kwargs))
+            n_puzzles += 1
+        return n_puzzles, n_solved
+    if max_pending is None:
+        max_pending = 4 * (n_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        pending = set()
+        for index, puzzle in enumerate(puzzles):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    n_solved += write(future.result())
+            pending.add(executor.submit(solve_puzzle, index, puzzle, seed,
+                                        move, kwargs))
+            n_puzzles += 1
+        for future in wait(pending)[0]:
+            n_solved += write(future.result())
+    return n_puzzles, n_solved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Solve the sudoku puzzles of a multi-puzzle file.')
+    parser.add_argument('input', help='file with the puzzles')
+    parser.add_argument('--output', default=None,
+                        help='output file (default: standard output)')
+    parser.add_argument('--n-workers', type=int, default=None,
+                        help='number of worker processes (1: serial)')
+    parser.add_argument('--seed', type=int, default=0, help='base seed')
+    parser.add_argument('--move', default='single', choices=['single', 'swap'],
+                        help='type of Monte Carlo move')
+    args = parser.parse_args()
+    time_start = time.perf_counter()
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        n_puzzles, n_solved = solve_stream(read_puzzles(args.input), out,
+                                           n_workers=args.n_workers,
+                                           seed=args.seed, move=args.move)
+    finally:
+        if args.output:
+            out.close()
+    print('[sudoku] solved %i/%i puzzles in %.2f s' % (
+        n_solved, n_puzzles, time.perf_counter() - time_start),
+        file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()